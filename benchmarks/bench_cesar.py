@@ -0,0 +1,59 @@
+"""Compare per-char and block Cesar encoding."""
+
+from argparse import ArgumentParser
+import timeit
+
+from mock import patch
+
+from text_encoder import Cesar, ScalarEncryptionKey, IterableEncryptionKey
+from text_encoder._printables import ASCII_PRINTABLES_CHARS
+
+
+def _per_char(coder, text):
+    return ''.join([coder.encode_char(char) for char in text])
+
+
+def _block(coder, text, block_size=64 * 1024):
+    return ''.join([coder.encode_block(text[i:i + block_size])
+                    for i in range(0, len(text), block_size)])
+
+
+def _pure_python_block(coder, text):
+    with patch('text_encoder._codes._get_numpy', return_value=None):
+        return _block(coder, text)
+
+
+def _scalar_per_char_coder():
+    coder = Cesar(ScalarEncryptionKey(7))
+    coder._text_table = None  # pylint: disable=protected-access
+    return coder
+
+
+CASES = (
+    ('scalar per char', _per_char, _scalar_per_char_coder),
+    ('scalar translate', _block, lambda: Cesar(ScalarEncryptionKey(7))),
+    ('running per char', _per_char, lambda: Cesar(IterableEncryptionKey('running key'))),
+    ('running block', _block, lambda: Cesar(IterableEncryptionKey('running key'))),
+    ('running pure block', _pure_python_block,
+     lambda: Cesar(IterableEncryptionKey('running key'))),
+)
+
+
+def main():
+    """Print throughput of Cesar encoding paths."""
+    parser = ArgumentParser()
+    parser.add_argument('--size', type=int, default=1024 * 1024, help='Input size in chars')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of repetitions')
+    arguments = parser.parse_args()
+
+    text = (ASCII_PRINTABLES_CHARS + '\n') * (arguments.size // (len(ASCII_PRINTABLES_CHARS) + 1))
+
+    for name, function, get_coder in CASES:
+        assert function(get_coder(), text) == _per_char(get_coder(), text)
+        seconds = min(timeit.repeat(lambda f=function, g=get_coder: f(g(), text),
+                                    number=1, repeat=arguments.repeat))
+        print('{:<20} {:10.2f} MB/s'.format(name, len(text) / seconds / 1e6))
+
+
+if __name__ == '__main__':
+    main()
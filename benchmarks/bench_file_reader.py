@@ -0,0 +1,65 @@
+"""Measure FileReader throughput per char and per block."""
+
+from argparse import ArgumentParser
+import os
+import tempfile
+import time
+
+from text_encoder import FileReader
+
+
+def _read_one_byte_at_a_time(path):
+    with open(path, 'rb') as file:
+        while True:
+            char = file.read(1)
+            if char:
+                yield char
+            else:
+                break
+
+
+def _consume(iterator):
+    size = 0
+    for item in iterator:
+        size += len(item)
+    return size
+
+
+MODES = {
+    'read(1)': _read_one_byte_at_a_time,
+    'chars': lambda path: FileReader(path).read(),
+    'blocks': lambda path: FileReader(path).read_blocks(),
+}
+
+
+def _create_input(size):
+    line = b'2020-01-01 12:00:00 INFO some log line to encode\n'
+    descriptor, path = tempfile.mkstemp()
+    with os.fdopen(descriptor, 'wb') as file:
+        block = line * (1024 * 1024 // len(line))
+        written = 0
+        while written < size:
+            written += file.write(block[:size - written])
+    return path
+
+
+def main():
+    """Print FileReader throughput for selected modes."""
+    parser = ArgumentParser()
+    parser.add_argument('--size', type=int, default=64 * 1024 * 1024, help='Input size in bytes')
+    parser.add_argument('--modes', nargs='+', default=list(MODES), choices=list(MODES))
+    arguments = parser.parse_args()
+
+    path = _create_input(arguments.size)
+    try:
+        for mode in arguments.modes:
+            start = time.perf_counter()
+            size = _consume(MODES[mode](path))
+            seconds = time.perf_counter() - start
+            print('{:<8} {:10.2f} MB/s'.format(mode, size / seconds / 1e6))
+    finally:
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
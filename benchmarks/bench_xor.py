@@ -0,0 +1,47 @@
+"""Compare per-char and block Xor encoding with iterable key."""
+
+from argparse import ArgumentParser
+import timeit
+
+from mock import patch
+
+from text_encoder import Xor, IterableEncryptionKey
+
+
+def _per_char(text, key):
+    coder = Xor(IterableEncryptionKey(key))
+    return ''.join([coder.encode_char(char) for char in text])
+
+
+def _block(text, key, block_size=64 * 1024):
+    coder = Xor(IterableEncryptionKey(key))
+    return ''.join([coder.encode_block(text[i:i + block_size])
+                    for i in range(0, len(text), block_size)])
+
+
+def _pure_python_block(text, key):
+    with patch('text_encoder._codes._get_numpy', return_value=None):
+        return _block(text, key)
+
+
+def main():
+    """Print throughput of Xor encoding paths."""
+    parser = ArgumentParser()
+    parser.add_argument('--size', type=int, default=1024 * 1024, help='Input size in chars')
+    parser.add_argument('--key', type=str, default='secret key', help='Repeating key')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of repetitions')
+    arguments = parser.parse_args()
+
+    text = ('some log line to encode\n' * (arguments.size // 24 + 1))[:arguments.size]
+    expected = _per_char(text, arguments.key)
+
+    for name, function in (('per char', _per_char), ('block', _block),
+                           ('pure python block', _pure_python_block)):
+        assert function(text, arguments.key) == expected
+        seconds = min(timeit.repeat(lambda f=function: f(text, arguments.key),
+                                    number=1, repeat=arguments.repeat))
+        print('{:<18} {:10.2f} MB/s'.format(name, len(text) / seconds / 1e6))
+
+
+if __name__ == '__main__':
+    main()
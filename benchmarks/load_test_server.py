@@ -0,0 +1,70 @@
+"""Load test encoding server, reporting requests per second and latency."""
+
+from argparse import ArgumentParser
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+
+from text_encoder._server import EncodingServer, EncodingClient
+
+
+def _run_client(address, requests, payload, latencies):
+    with EncodingClient(address) as client:
+        for _ in range(requests):
+            start = time.perf_counter()
+            client.encode(payload, 'xor', key_text='secret')
+            latencies.append(time.perf_counter() - start)
+
+
+def _spawn_server(port):
+    started = threading.Event()
+
+    async def serve():
+        with ThreadPoolExecutor() as executor:
+            server = EncodingServer(executor, port=port)
+            await server.start()
+            started.set()
+            await asyncio.Event().wait()
+
+    threading.Thread(target=asyncio.run, args=(serve(),), daemon=True).start()
+    started.wait()
+
+
+def main():
+    """Print load test summary."""
+    parser = ArgumentParser()
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='TCP host')
+    parser.add_argument('--port', type=int, default=8765, help='TCP port')
+    parser.add_argument('--socket', type=str, default=None, help='Unix socket path')
+    parser.add_argument('--spawn', action='store_true', help='Start server in this process')
+    parser.add_argument('--clients', type=int, default=8, help='Concurrent connections')
+    parser.add_argument('--requests', type=int, default=1000, help='Requests per client')
+    parser.add_argument('--size', type=int, default=64, help='Payload size in bytes')
+    arguments = parser.parse_args()
+
+    if arguments.spawn:
+        _spawn_server(arguments.port)
+    address = arguments.socket or (arguments.host, arguments.port)
+    payload = b'x' * arguments.size
+    latencies = []
+    clients = [threading.Thread(target=_run_client,
+                                args=(address, arguments.requests, payload, latencies))
+               for _ in range(arguments.clients)]
+
+    start = time.perf_counter()
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    seconds = time.perf_counter() - start
+
+    latencies.sort()
+    print('requests     {}'.format(len(latencies)))
+    print('requests/s   {:.0f}'.format(len(latencies) / seconds))
+    print('p50 latency  {:.3f} ms'.format(latencies[len(latencies) // 2] * 1e3))
+    print('p99 latency  {:.3f} ms'.format(latencies[int(len(latencies) * 0.99)] * 1e3))
+
+
+if __name__ == '__main__':
+    main()
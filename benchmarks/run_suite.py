@@ -0,0 +1,173 @@
+"""Measure every reader, coder, key, writer and header combination.
+
+Every case runs in a fresh process, so peak RSS belongs to the case only.
+Results are printed as JSON, and can be compared with results of another
+commit given as baseline.
+
+    python -m benchmarks.run_suite --sizes 1K 1M 64M --output results.json
+    python -m benchmarks.run_suite --sizes 1M --baseline results.json
+"""
+
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:  # pragma no cover
+    resource = None
+
+from text_encoder import (Encoder, DelimitedHeadedEncoder, Cesar, Xor, ScalarEncryptionKey,
+                          IterableEncryptionKey, StringReader, StringWriter, FileReader,
+                          FileWriter)
+from text_encoder._readers_writers import DEFAULT_BUFFER_SIZE
+
+READERS = ('string', 'file')
+CODERS = {'cesar': Cesar, 'xor': Xor}
+KEYS = {'scalar': lambda: ScalarEncryptionKey(7),
+        'iterable': lambda: IterableEncryptionKey('secret key')}
+WRITERS = ('string', 'file')
+HEADED = ('unheaded', 'headed')
+SIZE_UNITS = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+HEADER = b'header line left not encoded\n'
+
+
+def _parse_size(size):
+    if size[-1].upper() in SIZE_UNITS:
+        return int(size[:-1]) * SIZE_UNITS[size[-1].upper()]
+    return int(size)
+
+
+def _create_input(size):
+    line = b'2020-01-01 12:00:00 INFO some log line to encode\n'
+    descriptor, path = tempfile.mkstemp()
+    with os.fdopen(descriptor, 'wb') as file:
+        written = file.write(HEADER[:size])
+        block = line * (DEFAULT_BUFFER_SIZE // len(line))
+        while written < size:
+            written += file.write(block[:size - written])
+    return path
+
+
+def _get_peak_rss_kb():
+    if resource is None:
+        return None
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak_rss // 1024 if sys.platform == 'darwin' else peak_rss
+
+
+def _encode_once(case, in_path, block_size):
+    if case['reader'] == 'string':
+        with open(in_path, 'rb') as file:
+            reader = StringReader(file.read().decode('latin-1'))
+    else:
+        reader = FileReader(in_path, binary=True)
+    out_path = in_path + '.out'
+    writer = StringWriter() if case['writer'] == 'string' else FileWriter(out_path, binary=True)
+    coder = CODERS[case['coder']](KEYS[case['key']]())
+    if case['headed'] == 'headed':
+        encoder = DelimitedHeadedEncoder(reader, writer, coder, '\n', block_size)
+    else:
+        encoder = Encoder(reader, writer, coder, block_size)
+
+    start = time.perf_counter()
+    encoder.encode()
+    if case['writer'] == 'file':
+        writer.finish()
+    seconds = time.perf_counter() - start
+
+    if case['writer'] == 'file':
+        os.remove(out_path)
+    return seconds
+
+
+def _run_case(case, in_path, block_size, repeat):
+    seconds = min(_encode_once(case, in_path, block_size) for _ in range(repeat))
+    return dict(case, seconds=seconds, mb_per_s=case['size'] / seconds / 1e6,
+                peak_rss_kb=_get_peak_rss_kb())
+
+
+def _run_in_fresh_process(case, in_path, block_size, repeat):
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(1, mp_context=context) as executor:
+        return executor.submit(_run_case, case, in_path, block_size, repeat).result()
+
+
+def _get_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              check=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _case_key(result):
+    return tuple(result[name] for name in ('reader', 'coder', 'key', 'writer', 'headed', 'size'))
+
+
+def _print_comparison(results, baseline_path):
+    with open(baseline_path) as file:
+        baseline = {_case_key(result): result for result in json.load(file)['results']}
+    for result in results:
+        old = baseline.get(_case_key(result))
+        if old is not None:
+            print('{:<50} {:10.2f} -> {:10.2f} MB/s ({:+.0%})'.format(
+                ' '.join(map(str, _case_key(result))), old['mb_per_s'], result['mb_per_s'],
+                result['mb_per_s'] / old['mb_per_s'] - 1), file=sys.stderr)
+
+
+def main():
+    """Run selected benchmark cases and print results as JSON."""
+    parser = ArgumentParser()
+    parser.add_argument('--sizes', nargs='+', default=['1K', '1M', '64M'],
+                        help='Input sizes, with optional K, M or G suffix, up to 1G')
+    parser.add_argument('--readers', nargs='+', default=list(READERS), choices=READERS)
+    parser.add_argument('--coders', nargs='+', default=list(CODERS), choices=list(CODERS))
+    parser.add_argument('--keys', nargs='+', default=list(KEYS), choices=list(KEYS))
+    parser.add_argument('--writers', nargs='+', default=list(WRITERS), choices=WRITERS)
+    parser.add_argument('--headed', nargs='+', default=list(HEADED), choices=HEADED)
+    parser.add_argument('--block_size', type=int, default=DEFAULT_BUFFER_SIZE,
+                        help='Encoding block size in bytes')
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='Number of repetitions of every case, best time is kept')
+    parser.add_argument('--output', type=str, default=None, help='JSON output file')
+    parser.add_argument('--baseline', type=str, default=None,
+                        help='JSON output of earlier run to compare with')
+    arguments = parser.parse_args()
+
+    results = []
+    for size in map(_parse_size, arguments.sizes):
+        in_path = _create_input(size)
+        try:
+            for reader, coder, key, writer, headed in product(
+                    arguments.readers, arguments.coders, arguments.keys, arguments.writers,
+                    arguments.headed):
+                case = dict(reader=reader, coder=coder, key=key, writer=writer, headed=headed,
+                            size=size)
+                results.append(_run_in_fresh_process(case, in_path, arguments.block_size,
+                                                     arguments.repeat))
+        finally:
+            os.remove(in_path)
+
+    report = json.dumps({'commit': _get_commit(), 'python': platform.python_version(),
+                         'block_size': arguments.block_size, 'repeat': arguments.repeat,
+                         'results': results}, indent=2)
+    if arguments.output:
+        with open(arguments.output, 'w') as file:
+            file.write(report)
+    else:
+        print(report)
+    if arguments.baseline:
+        _print_comparison(results, arguments.baseline)
+
+
+if __name__ == '__main__':
+    main()
@@ -4,9 +4,25 @@
 # pylint: disable=missing-class-docstring
 # pylint: disable=no-self-use
 
+import subprocess
+import sys
+import textwrap
+
+from mock import patch
+import pytest
 
 from text_encoder import Cesar, Xor, IterableEncryptionKey, ScalarEncryptionKey
-from text_encoder._printables import ascii_codes_table_size
+from text_encoder._printables import ascii_codes_table_size, ASCII_PRINTABLES_CHARS
+
+
+@pytest.fixture(params=['numpy', 'pure python'])
+def backend(request):
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+        yield
+    else:
+        with patch('text_encoder._codes._get_numpy', return_value=None):
+            yield
 
 
 class TestCesar:
@@ -41,6 +57,24 @@ class TestCesar:
         result = cesar.encode_char('&')
         assert result == '~'
 
+    def test_cesar_translation_table_matches_per_char_encoding(self):
+        text = ASCII_PRINTABLES_CHARS + '\n\t' + chr(0x01) + chr(0xe9) + chr(0x2603)
+        for key in (1, -3, 7, ascii_codes_table_size, -2 * ascii_codes_table_size - 7, '1'):
+            cesar = Cesar(ScalarEncryptionKey(key))
+            per_char = ''.join(chr(cesar._get_new_ascii_code(c))  # pylint: disable=protected-access
+                               if c in ASCII_PRINTABLES_CHARS else c for c in text)
+            assert cesar.encode_block(text) == per_char
+
+    def test_cesar_translates_latin1_text_like_per_char_encoding(self):
+        text = 'test \xe9\xff me'
+        cesar = Cesar(ScalarEncryptionKey(2))
+        assert cesar.encode_block(text) == ''.join(cesar.encode_char(c) for c in text)
+
+    def test_cesar_encodes_bytes_block_with_scalar_key(self):
+        cesar = Cesar(ScalarEncryptionKey(2))
+        result = cesar.encode_block(b'test me\x01')
+        assert result == b'vguv"og\x01'
+
 
 class TestXor:
 
@@ -49,6 +83,146 @@ class TestXor:
         result = xor.encode_char('a')
         assert result == 'b'
 
+    def test_xor_block_matches_per_char_encoding(self):
+        text = 'test me\n' + chr(0xe9) + chr(0x2603)
+        per_char = ''.join(Xor(ScalarEncryptionKey(3)).encode_char(c) for c in text)
+        assert Xor(ScalarEncryptionKey(3)).encode_block(text) == per_char
+
+    def test_xor_translates_latin1_text_like_per_char_encoding(self):
+        text = 'test \xe9\xff me'
+        xor = Xor(ScalarEncryptionKey(3))
+        assert xor.encode_block(text) == ''.join(xor.encode_char(c) for c in text)
+
+    def test_xor_encodes_bytes_block_with_scalar_key(self):
+        xor = Xor(ScalarEncryptionKey(3))
+        result = xor.encode_block(b'abc')
+        assert result == b'ba`'
+
+
+class TestXorWithIterableKey:
+
+    @staticmethod
+    def _per_char(text, keys):
+        xor = Xor(IterableEncryptionKey(keys))
+        return ''.join(xor.encode_char(c) for c in text)
+
+    def test_xor_blocks_match_per_char_encoding(self, backend):
+        text = 'some longer text to encode\n' * 3
+        xor = Xor(IterableEncryptionKey([1, 2, 3, 4, 5]))
+        blocks = [text[i:i + 7] for i in range(0, len(text), 7)]
+        assert ''.join(xor.encode_block(block) for block in blocks) == \
+            self._per_char(text, [1, 2, 3, 4, 5])
+
+    def test_xor_bytes_blocks_match_per_char_encoding(self, backend):
+        xor = Xor(IterableEncryptionKey('key'))
+        result = xor.encode_block(b'test') + xor.encode_block(memoryview(b' me'))
+        assert result == self._per_char('test me', 'key').encode('latin-1')
+
+    def test_xor_blocks_with_wide_chars_match_per_char_encoding(self):
+        text = 'test ' + chr(0x2603) + ' me'
+        xor = Xor(IterableEncryptionKey([1, 300]))
+        assert xor.encode_block(text[:3]) + xor.encode_block(text[3:]) == \
+            self._per_char(text, [1, 300])
+
+
+class TestCesarWithIterableKey:
+
+    @staticmethod
+    def _per_char(text, keys):
+        cesar = Cesar(IterableEncryptionKey(keys))
+        return ''.join(cesar.encode_char(c) for c in text)
+
+    def test_cesar_blocks_match_per_char_encoding(self, backend):
+        text = 'some\tlonger text ~ to encode\x01\n' * 3
+        cesar = Cesar(IterableEncryptionKey('running key'))
+        blocks = [text[i:i + 7] for i in range(0, len(text), 7)]
+        assert ''.join(cesar.encode_block(block) for block in blocks) == \
+            self._per_char(text, 'running key')
+
+    def test_cesar_bytes_blocks_with_wide_keys_match_per_char_encoding(self, backend):
+        keys = [-3, 2 * ascii_codes_table_size + 7, 300]
+        cesar = Cesar(IterableEncryptionKey(keys))
+        result = cesar.encode_block(b'test\n') + cesar.encode_block(memoryview(b' me\xe9'))
+        assert result == self._per_char('test\n me\xe9', keys).encode('latin-1')
+
+    def test_cesar_block_with_wide_chars_matches_per_char_encoding(self):
+        text = 'test ' + chr(0x2603) + ' me'
+        cesar = Cesar(IterableEncryptionKey([1, 2]))
+        assert cesar.encode_block(text) == self._per_char(text, [1, 2])
+
+
+class TestCoderEncodeBlock:
+
+    def test_iterable_key_block_continues_key_between_blocks(self):
+        per_char_cesar = Cesar(IterableEncryptionKey([1, 2, 3]))
+        per_char = ''.join(per_char_cesar.encode_char(c) for c in 'test me')
+        cesar = Cesar(IterableEncryptionKey([1, 2, 3]))
+        assert cesar.encode_block('test') + cesar.encode_block(' me') == per_char
+
+    def test_bytes_block_is_encoded_as_latin1_text(self):
+        xor = Xor(IterableEncryptionKey([1, 2]))
+        result = xor.encode_block(b'ab')
+        assert result == b'``'
+
+    @pytest.mark.parametrize('coder_type', [Cesar, Xor])
+    def test_reset_starts_key_from_beginning(self, coder_type):
+        coder = coder_type(IterableEncryptionKey([1, 2, 3]))
+        first = coder.encode_block('ab')
+        coder.reset()
+        assert coder.encode_block('ab') == first
+        assert coder.key_period == 3
+
+
+class TestEncodeBlockInto:
+
+    @pytest.mark.parametrize('coder_type, key_type, key', [
+        (Cesar, ScalarEncryptionKey, 5), (Cesar, IterableEncryptionKey, 'key'),
+        (Cesar, IterableEncryptionKey, [1, 300]), (Xor, ScalarEncryptionKey, 5),
+        (Xor, IterableEncryptionKey, 'key')])
+    def test_output_matches_encode_block(self, backend, coder_type, key_type, key):
+        data = bytes(range(256)) * 2
+        expected_coder = coder_type(key_type(key))
+        expected = expected_coder.encode_block(data[:100]) + expected_coder.encode_block(data[100:])
+        coder = coder_type(key_type(key))
+        output = bytearray(len(data) + 10)
+        sizes = [coder.encode_block_into(memoryview(data)[:100], output),
+                 coder.encode_block_into(data[100:], memoryview(output)[100:])]
+        assert sizes == [100, len(data) - 100]
+        assert bytes(output[:len(data)]) == expected
+
+    @pytest.mark.parametrize('coder_type', [Cesar, Xor])
+    def test_scalar_key_is_translated_without_numpy(self, coder_type):
+        coder = coder_type(ScalarEncryptionKey(5))
+        output = bytearray(3)
+        with patch('text_encoder._codes._get_numpy') as get_numpy:
+            assert coder.encode_block_into(b'abc', output) == 3
+        get_numpy.assert_not_called()
+        assert bytes(output) == coder.encode_block(b'abc')
+
+
+class TestNumpyImport:
+
+    def test_numpy_is_usable_from_threads_using_it_first(self):
+
+        pytest.importorskip('numpy')
+        # Fresh interpreter, so that NumPy is first imported by the threads.
+        statement = textwrap.dedent('''
+            from concurrent.futures import ThreadPoolExecutor
+            from threading import Barrier
+            from text_encoder import Cesar, IterableEncryptionKey
+
+            barrier = Barrier(16)
+
+            def encode(_):
+                barrier.wait()
+                return Cesar(IterableEncryptionKey('secret')).encode_block(b'test me' * 1000)
+
+            with ThreadPoolExecutor(16) as executor:
+                assert len(set(executor.map(encode, range(16)))) == 1
+            ''')
+
+        subprocess.run([sys.executable, '-c', statement], check=True)
+
 
 class TestIterableEncryptionKey:
 
@@ -59,6 +233,44 @@ class TestIterableEncryptionKey:
         assert i.get() == 3
         assert i.get() == 1
 
+    def test_get_many_continues_key_phase(self):
+        i = IterableEncryptionKey([1, 2, 3])
+        assert i.get() == 1
+        assert i.get_many(7) == [2, 3, 1, 2, 3, 1, 2]
+        assert i.get() == 3
+
+    def test_key_at_addresses_looped_key_without_moving_stream(self):
+        i = IterableEncryptionKey([1, 2, 3])
+        assert i.key_at(0) == 1
+        assert i.key_at(5) == 3
+        assert i.key_at(10 ** 12) == 2
+        assert i.get() == 1
+
+    def test_slice_does_not_move_stream(self):
+        i = IterableEncryptionKey('abc')
+        assert i.slice(4, 5) == [98, 99, 97, 98, 99]
+        assert i.get() == 97
+
+    def test_seek_tell_and_reset_move_stream(self):
+        i = IterableEncryptionKey([1, 2, 3])
+        i.seek(7)
+        assert i.tell() == 1
+        assert i.get() == 2
+        assert i.tell() == 2
+        i.reset()
+        assert i.get() == 1
+
+    def test_get_many_bytes_continues_key_phase(self):
+        i = IterableEncryptionKey('abc')
+        assert i.get_many_bytes(4) == b'abca'
+        assert i.get_many_bytes(2) == b'bc'
+
+    def test_get_many_bytes_of_wide_key_raises_without_moving_phase(self):
+        i = IterableEncryptionKey([1, 300])
+        with pytest.raises(ValueError):
+            i.get_many_bytes(2)
+        assert i.get() == 1
+
 
 class TestScalarEncryptionKey:
 
@@ -69,3 +281,14 @@ class TestScalarEncryptionKey:
     def test_key_stays_int(self):
         k = ScalarEncryptionKey(1)
         assert k.get() == 1
+
+    def test_get_many_repeats_key(self):
+        k = ScalarEncryptionKey('1')
+        assert k.get_many(3) == [49, 49, 49]
+
+    def test_key_is_the_same_at_every_offset(self):
+        k = ScalarEncryptionKey(5)
+        k.seek(10 ** 12)
+        assert k.tell() == 0
+        assert k.key_at(10 ** 12) == 5
+        assert k.slice(3, 2) == [5, 5]
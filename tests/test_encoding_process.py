@@ -6,11 +6,22 @@
 # pylint: disable=unused-argument
 # pylint: disable=attribute-defined-outside-init
 
+import asyncio
+import gzip
+from io import BytesIO
+import logging
+import lzma
+import pstats
+import tracemalloc
+
 from mock import patch, mock_open, MagicMock, call
 import pytest
 
-from text_encoder import Cesar, Xor, ScalarEncryptionKey
-from text_encoder import Encoder, HeadedEncoder, NullCoder
+from text_encoder import Cesar, Xor, ScalarEncryptionKey, IterableEncryptionKey
+from text_encoder import Encoder, HeadedEncoder, NullCoder, ParallelEncoder, encode_inplace
+from text_encoder import DelimitedHeadedEncoder, RecordEncoder, MmapFileReader
+from text_encoder import AsyncEncoder, AsyncStreamReader, AsyncStreamWriter
+from text_encoder import CheckpointedEncoder, Checkpoint, PipelinedEncoder
 from text_encoder.__main__ import main
 from text_encoder import StringReader, StringWriter, FileReader, FileWriter
 from text_encoder._encoding_process import EncodingDoneObservable
@@ -130,6 +141,162 @@ class TestEncoder:
 
         assert result_string == 'bbbbbc'
 
+    def test_string_is_encoded_in_blocks(self):
+
+        string_writer = StringWriter()
+
+        encoder = Encoder(StringReader('test me'), string_writer,
+                          Xor(IterableEncryptionKey([1, 2, 3])), block_size=3)
+        encoder.encode()
+
+        assert string_writer._output == ['ugp', 'u"n', 'd']  # pylint: disable=protected-access
+
+    def test_block_encoder_is_stopped_on_stop_predicate(self):
+
+        string_writer = StringWriter()
+
+        encoder = Encoder(StringReader('aaaaabccccc'), string_writer,
+                          Cesar(ScalarEncryptionKey(1)), block_size=4)
+        encoder.encode(lambda x: x == 'b')
+
+        assert string_writer.get() == 'bbbbbc'
+
+    def test_headed_body_is_encoded_in_blocks(self):
+
+        string_reader = StringReader('some header \n test me')
+        string_writer = StringWriter()
+
+        header_rewriter = NullCoder(string_reader, string_writer, block_size=4)
+        body_encoder = Encoder(string_reader, string_writer, Xor(ScalarEncryptionKey(3)),
+                               block_size=4)
+
+        encoder = HeadedEncoder(header_rewriter, body_encoder, lambda x: x == '\n')
+        encoder.encode()
+
+        assert string_writer.get() == 'some header \n#wfpw#nf'
+
+
+class TestDelimitedHeadedEncoder:
+
+    @pytest.mark.parametrize('block_size', [1, 2, 5, 64])
+    def test_body_is_encoded_after_delimiter_split_between_blocks(self, block_size):
+
+        string_writer = StringWriter()
+        encoder = DelimitedHeadedEncoder(StringReader('some header\r\n test me'), string_writer,
+                                         Xor(ScalarEncryptionKey(3)), '\r\n', block_size)
+        encoder.encode()
+
+        assert string_writer.get() == 'some header\r\n#wfpw#nf'
+
+    def test_header_is_written_in_one_write(self):
+
+        writer = MagicMock()
+        encoder = DelimitedHeadedEncoder(StringReader('header\nbody'), writer,
+                                         Cesar(ScalarEncryptionKey(1)), '\n')
+        encoder.encode()
+
+        assert writer.write.call_args_list == [call('header\n'), call('cpez')]
+
+    def test_nothing_is_encoded_without_delimiter(self):
+
+        string_writer = StringWriter()
+        encoder = DelimitedHeadedEncoder(StringReader('no header end'), string_writer,
+                                         Cesar(ScalarEncryptionKey(1)), '\n', 3)
+        encoder.encode()
+
+        assert string_writer.get() == 'no header end'
+
+    def test_str_delimiter_is_found_in_bytes_blocks(self, tmp_path):
+
+        path = tmp_path / 'file.txt'
+        path.write_bytes(b'header\ntest me')
+        writer = MagicMock()
+
+        DelimitedHeadedEncoder(MmapFileReader(str(path)), writer,
+                               Xor(ScalarEncryptionKey(3)), '\n').encode()
+
+        assert writer.write.call_args_list == [call(b'header\n'), call(b'wfpw#nf')]
+
+    def test_stop_predicate_is_not_supported(self):
+
+        encoder = DelimitedHeadedEncoder(StringReader('a\nb'), StringWriter(),
+                                         Cesar(ScalarEncryptionKey(1)), '\n')
+
+        with pytest.raises(ValueError):
+            encoder.encode(lambda x: x == 'a')
+
+
+class TestRecordEncoder:
+
+    TEXT = 'h1\nabcd\n\nh2\nabcd\n\nno header\n\nh3\nab'
+
+    @pytest.mark.parametrize('block_size', [1, 2, 3, 64])
+    def test_key_is_continued_over_record_bodies(self, block_size):
+
+        string_writer = StringWriter()
+        encoder = RecordEncoder(StringReader(self.TEXT), string_writer,
+                                Cesar(IterableEncryptionKey([1, 2, 3])), '\n\n', '\n',
+                                block_size=block_size)
+        encoder.encode()
+
+        assert string_writer.get() == 'h1\nbdfe\n\nh2\ncedf\n\nno header\n\nh3\ndc'
+
+    @pytest.mark.parametrize('block_size', [1, 2, 3, 64])
+    def test_key_is_reset_in_every_record_body(self, block_size):
+
+        string_writer = StringWriter()
+        encoder = RecordEncoder(StringReader(self.TEXT), string_writer,
+                                Cesar(IterableEncryptionKey([1, 2, 3])), '\n\n', '\n',
+                                reset_key=True, block_size=block_size)
+        encoder.encode()
+
+        assert string_writer.get() == 'h1\nbdfe\n\nh2\nbdfe\n\nno header\n\nh3\nbd'
+
+    def test_key_is_reset_by_coder_without_key_period(self):
+
+        coder = Cesar(IterableEncryptionKey([1, 2, 3]))
+        coder.key_period = None
+        string_writer = StringWriter()
+
+        RecordEncoder(StringReader(self.TEXT), string_writer, coder, '\n\n', '\n',
+                      reset_key=True).encode()
+
+        assert string_writer.get() == 'h1\nbdfe\n\nh2\nbdfe\n\nno header\n\nh3\nbd'
+
+    @pytest.mark.parametrize('block_size', [3, 64])
+    def test_bodies_are_not_padded_to_key_longer_than_bodies(self, block_size):
+
+        key = [1, 2, 3] + [5] * 10000
+        string_writer = StringWriter()
+        encoder = RecordEncoder(StringReader(self.TEXT), string_writer,
+                                Cesar(IterableEncryptionKey(key)), '\n\n', '\n',
+                                reset_key=True, block_size=block_size)
+        with patch.object(RecordEncoder, '_encode_from_key_start') as encode_from_key_start:
+            encoder.encode()
+
+        encode_from_key_start.assert_not_called()
+        assert string_writer.get() == 'h1\nbdfi\n\nh2\nbdfi\n\nno header\n\nh3\nbd'
+
+    def test_bytes_records_are_encoded(self, tmp_path):
+
+        path = tmp_path / 'file.txt'
+        path.write_bytes(b'h1\ntest\x1eh2\nme')
+        writer = MagicMock()
+
+        RecordEncoder(MmapFileReader(str(path)), writer, Xor(ScalarEncryptionKey(3)),
+                      '\x1e', '\n').encode()
+
+        assert writer.write.call_args_list == [call(b'h1\nwfpw\x1eh2\nnf')]
+
+    def test_records_are_encoded_from_command_line(self, capsys):
+
+        with patch('sys.argv', ['main', '--in_string=h1\nab\n\nh2\nab', '--out_console',
+                                '--cesar', '--keys_int=1,2,3',
+                                '--record_delimiter=\\n\\n', '--reset_key']):
+            main()
+
+        assert capsys.readouterr().out == 'h1\nbd\n\nh2\nbd'
+
 
 class TestNullEncoder:
 
@@ -145,6 +312,16 @@ class TestNullEncoder:
 
         assert result_string == 'test'
 
+    @staticmethod
+    def test_null_encoder_rewrites_blocks():
+
+        string_writer = StringWriter()
+
+        null_coder = NullCoder(StringReader('test'), string_writer, block_size=3)
+        null_coder.encode()
+
+        assert string_writer._output == ['tes', 't']  # pylint: disable=protected-access
+
 
 class TestMain:
 
@@ -236,6 +413,15 @@ class TestMain:
 
         assert out == "aaa\nbbb"
 
+    def test_string_is_encoded_with_codec_selected_by_name(self, capsys):
+
+        with patch('sys.argv', ['main', '--in_string=aaa', '--out_console', '--codec=xor',
+                                '--key=3']):
+            main()
+        out, _ = capsys.readouterr()
+
+        assert out == "bbb"
+
     @pytest.fixture()
     def sysargv_no_reader_mock(self):
         with patch('sys.argv',
@@ -289,6 +475,693 @@ class TestMain:
         assert 'No key nor key_vector provided.' in error.value.args
 
 
+class TestEncodeInplace:
+
+    def test_bytearray_is_encoded_in_place(self):
+
+        buffer = bytearray(b'test me')
+        encode_inplace(buffer, Cesar(ScalarEncryptionKey(2)), block_size=3)
+
+        assert buffer == bytearray(b'vguv"og')
+
+    def test_memoryview_is_encoded_like_encoder(self):
+
+        string_writer = StringWriter()
+        Encoder(StringReader('test me'), string_writer,
+                Xor(IterableEncryptionKey([1, 2, 3]))).encode()
+        buffer = bytearray(b'test me')
+
+        encode_inplace(memoryview(buffer), Xor(IterableEncryptionKey([1, 2, 3])), block_size=2)
+
+        assert buffer.decode() == string_writer.get()
+
+    def test_file_body_is_encoded_in_place(self, tmp_path):
+
+        path = tmp_path / 'file.txt'
+        path.write_bytes(b'some header \n test me')
+
+        encode_inplace(str(path), Xor(ScalarEncryptionKey(3)), header_delimiter='\n', block_size=4)
+
+        assert path.read_bytes() == b'some header \n#wfpw#nf'
+
+    def test_nothing_is_encoded_without_end_of_header(self):
+
+        buffer = bytearray(b'test me')
+        encode_inplace(buffer, Xor(ScalarEncryptionKey(3)), header_delimiter=b'\r\n')
+
+        assert buffer == bytearray(b'test me')
+
+    def test_empty_file_is_left_empty(self, tmp_path):
+
+        path = tmp_path / 'file.txt'
+        path.write_bytes(b'')
+
+        encode_inplace(str(path), Xor(ScalarEncryptionKey(3)))
+
+        assert path.read_bytes() == b''
+
+
+class TestParallelEncoder:
+
+    TEXT = 'header line\n' + 'some \x01 text to encode ~ in ranges\n' * 20
+
+    @pytest.fixture()
+    def files(self, tmp_path):
+        self.in_path = tmp_path / 'in_file.txt'
+        self.out_path = tmp_path / 'out_file.txt'
+        self.in_path.write_bytes(self.TEXT.encode())
+        yield
+
+    def _serial(self, coder):
+        string_writer = StringWriter()
+        Encoder(StringReader(self.TEXT), string_writer, coder).encode()
+        return string_writer.get().encode('latin-1')
+
+    @pytest.mark.parametrize('coder_type', [Cesar, Xor])
+    def test_output_is_identical_to_serial_encoding(self, files, coder_type):
+
+        encoder = ParallelEncoder(str(self.in_path), str(self.out_path), coder_type,
+                                  IterableEncryptionKey('secret'), workers=2, range_size=7)
+        encoder.encode()
+
+        assert self.out_path.read_bytes() == self._serial(coder_type(IterableEncryptionKey('secret')))
+
+    def test_header_is_not_encoded(self, files):
+
+        encoder = ParallelEncoder(str(self.in_path), str(self.out_path), Xor,
+                                  ScalarEncryptionKey(3), workers=2,
+                                  header_delimiter=b'\n', range_size=16)
+        encoder.encode()
+        result = self.out_path.read_bytes()
+
+        assert result[:12] == b'header line\n'
+        assert result[12:] == self._serial(Xor(ScalarEncryptionKey(3)))[12:]
+
+    def test_empty_file_is_encoded_to_empty_file(self, tmp_path):
+
+        in_path = tmp_path / 'in_file.txt'
+        in_path.write_bytes(b'')
+        out_path = tmp_path / 'out_file.txt'
+
+        ParallelEncoder(str(in_path), str(out_path), Xor, ScalarEncryptionKey(3)).encode()
+
+        assert out_path.read_bytes() == b''
+
+    def test_stop_predicate_is_not_supported(self, files):
+
+        encoder = ParallelEncoder(str(self.in_path), str(self.out_path), Xor,
+                                  ScalarEncryptionKey(3))
+
+        with pytest.raises(ValueError):
+            encoder.encode(lambda x: x == 'a')
+
+    def test_file_is_encoded_on_workers_from_command_line(self, files):
+
+        with patch('sys.argv', ['main', '--in_file={}'.format(self.in_path),
+                                '--out_file={}'.format(self.out_path),
+                                '--cesar', '--key_text=abc', '--workers=2']):
+            main()
+
+        assert self.out_path.read_bytes() == self._serial(Cesar(IterableEncryptionKey('abc')))
+
+    def test_runtime_error_raised_if_workers_have_no_output_file(self, files):
+
+        with patch('sys.argv', ['main', '--in_file={}'.format(self.in_path),
+                                '--out_console', '--xor', '--key=3', '--workers=2']):
+            with pytest.raises(RuntimeError) as error:
+                main()
+
+        assert 'Parallel mode needs input and output file.' in error.value.args
+
+    @pytest.mark.parametrize('option', ['--mmap', '--record_delimiter=\\n\\n'])
+    def test_runtime_error_raised_if_parallel_mode_is_combined_with(self, files, option):
+
+        with patch('sys.argv', ['main', '--in_file={}'.format(self.in_path),
+                                '--out_file={}'.format(self.out_path), '--xor', '--key=3',
+                                '--workers=2', option]):
+            with pytest.raises(RuntimeError) as error:
+                main()
+
+        assert error.value.args == (
+            'Parallel mode cannot be combined with memory mapped or record mode.',)
+
+
+class TestCheckpointedEncoder:
+
+    TEXT = 'header line\n' + 'some \x01 text to encode ~ with checkpoints\n' * 20
+
+    @pytest.fixture()
+    def files(self, tmp_path):
+        self.in_path = tmp_path / 'in_file.txt'
+        self.out_path = tmp_path / 'out_file.txt'
+        self.checkpoint_path = tmp_path / 'out_file.txt.checkpoint'
+        self.in_path.write_bytes(self.TEXT.encode())
+        yield
+
+    def _encoder(self, coder_type, header_delimiter=None, resume=False):
+        return CheckpointedEncoder(str(self.in_path), str(self.out_path), coder_type,
+                                   IterableEncryptionKey('secret'), header_delimiter, resume,
+                                   checkpoint_size=50, block_size=16)
+
+    def _uninterrupted(self, coder_type, header_delimiter=None):
+        self._encoder(coder_type, header_delimiter).encode()
+        return self.out_path.read_bytes()
+
+    def _interrupt(self, coder_type, header_delimiter, blocks):
+        original = coder_type.encode_block_into
+        calls = []
+
+        def encode_block_into(coder, chunk, output):
+            calls.append(chunk)
+            if len(calls) > blocks:
+                raise KeyboardInterrupt
+            return original(coder, chunk, output)
+
+        with patch.object(coder_type, 'encode_block_into', encode_block_into):
+            with pytest.raises(KeyboardInterrupt):
+                self._encoder(coder_type, header_delimiter).encode()
+
+    @pytest.mark.parametrize('coder_type', [Cesar, Xor])
+    @pytest.mark.parametrize('header_delimiter', [None, b'\n', b'line\nsome'])
+    def test_resumed_output_is_identical_to_uninterrupted(self, files, coder_type,
+                                                          header_delimiter):
+        expected = self._uninterrupted(coder_type, header_delimiter)
+
+        self._interrupt(coder_type, header_delimiter, blocks=20)
+        checkpoint = Checkpoint.load(str(self.checkpoint_path))
+        with open(str(self.out_path), 'ab') as file:
+            file.write(b'partial block written after checkpoint')
+        self._encoder(coder_type, header_delimiter, resume=True).encode()
+
+        assert 0 < checkpoint.in_offset < len(self.TEXT)
+        assert checkpoint.in_offset == checkpoint.out_offset
+        assert checkpoint.header_passed
+        assert self.out_path.read_bytes() == expected
+        assert not self.checkpoint_path.exists()
+
+    def test_resume_without_checkpoint_encodes_from_start(self, files):
+        expected = self._uninterrupted(Xor)
+
+        self._encoder(Xor, resume=True).encode()
+
+        assert self.out_path.read_bytes() == expected
+
+    def test_checkpoint_of_other_input_is_rejected(self, files):
+        Checkpoint(in_offset=10, out_offset=10, in_size=1).save(str(self.checkpoint_path))
+
+        with pytest.raises(ValueError):
+            self._encoder(Xor, resume=True).encode()
+
+    @pytest.mark.parametrize('coder_type, key, header_delimiter', [
+        (Cesar, IterableEncryptionKey('secret'), None),
+        (Xor, IterableEncryptionKey('other'), None),
+        (Xor, ScalarEncryptionKey(3), None),
+        (Xor, IterableEncryptionKey('secret'), b'\n')])
+    def test_checkpoint_of_other_encoding_is_rejected(self, files, coder_type, key,
+                                                      header_delimiter):
+        self._interrupt(Xor, None, blocks=5)
+
+        with pytest.raises(ValueError) as error:
+            CheckpointedEncoder(str(self.in_path), str(self.out_path), coder_type, key,
+                                header_delimiter, resume=True).encode()
+
+        assert error.value.args == ('Checkpoint does not match codec, key or header delimiter.',)
+
+    def test_checkpoint_records_header_not_passed(self, files):
+        self.in_path.write_bytes(b'x' * 200 + b'\n' + b'y' * 50)
+        expected = self._uninterrupted(Cesar, b'\n')
+        with patch.object(Checkpoint, 'save', side_effect=KeyboardInterrupt,
+                          autospec=True) as save:
+            with pytest.raises(KeyboardInterrupt):
+                self._encoder(Cesar, b'\n').encode()
+        checkpoint = save.call_args[0][0]
+        checkpoint.save(str(self.checkpoint_path))
+
+        self._encoder(Cesar, b'\n', resume=True).encode()
+
+        assert not checkpoint.header_passed
+        assert self.out_path.read_bytes() == expected
+
+    def test_file_is_resumed_from_command_line(self, files):
+        expected = self._uninterrupted(Xor, b'\n')
+        self._interrupt(Xor, b'\n', blocks=5)
+        assert self.checkpoint_path.exists()
+        with open(str(self.out_path), 'ab') as file:
+            file.write(b'garbage')
+
+        with patch('sys.argv', ['main', '--in_file={}'.format(self.in_path),
+                                '--out_file={}'.format(self.out_path), '--xor',
+                                '--key_text=secret', '--headed', '--resume']):
+            main()
+
+        assert self.out_path.read_bytes() == expected
+
+    def test_runtime_error_raised_if_checkpoint_has_no_output_file(self, files):
+
+        with patch('sys.argv', ['main', '--in_file={}'.format(self.in_path),
+                                '--out_console', '--xor', '--key=3', '--checkpoint']):
+            with pytest.raises(RuntimeError) as error:
+                main()
+
+        assert 'Checkpointed mode needs input and output file.' in error.value.args
+
+    @pytest.mark.parametrize('mode', ['--checkpoint', '--resume'])
+    @pytest.mark.parametrize('option', ['--workers=2', '--mmap', '--record_delimiter=\\n\\n'])
+    def test_runtime_error_raised_if_checkpointed_mode_is_combined_with(self, files, mode,
+                                                                         option):
+
+        with patch('sys.argv', ['main', '--in_file={}'.format(self.in_path),
+                                '--out_file={}'.format(self.out_path), '--xor', '--key=3',
+                                mode, option]):
+            with pytest.raises(RuntimeError) as error:
+                main()
+
+        assert error.value.args == (
+            'Checkpointed mode cannot be combined with parallel, memory mapped or record mode.',)
+
+
+class TestPipelinedEncoder:
+
+    TEXT = 'some \x01 text to encode ~ on threads\n' * 50
+
+    def _serial(self, coder):
+        string_writer = StringWriter()
+        Encoder(StringReader(self.TEXT), string_writer, coder).encode()
+        return string_writer.get()
+
+    @pytest.mark.parametrize('coder_type', [Cesar, Xor])
+    @pytest.mark.parametrize('queue_depth', [1, 3])
+    def test_file_bytes_are_encoded_like_serially(self, tmp_path, coder_type, queue_depth):
+
+        path = tmp_path / 'in_file.txt'
+        path.write_bytes(self.TEXT.encode('latin-1'))
+        string_writer = StringWriter()
+
+        PipelinedEncoder(FileReader(str(path), binary=True), string_writer,
+                         coder_type(IterableEncryptionKey('secret')), 7, queue_depth).encode()
+
+        assert string_writer.get() == self._serial(coder_type(IterableEncryptionKey('secret')))
+
+    def test_text_blocks_are_encoded_like_serially(self):
+
+        string_writer = StringWriter()
+
+        PipelinedEncoder(StringReader(self.TEXT), string_writer,
+                         Xor(IterableEncryptionKey('secret')), 5, 2).encode()
+
+        assert string_writer.get() == self._serial(Xor(IterableEncryptionKey('secret')))
+
+    def test_buffers_are_recycled(self):
+
+        written = []
+        writer = MagicMock(write=lambda block: written.append(block.obj))
+
+        PipelinedEncoder(MagicMock(read_blocks=lambda size: iter([b'ab'] * 100)), writer,
+                         Xor(ScalarEncryptionKey(3)), 2, 1).encode()
+
+        assert len({id(buffer) for buffer in written}) <= 6
+
+    @pytest.mark.parametrize('failing_stage', ['reader', 'coder', 'writer'])
+    def test_error_of_any_stage_is_raised(self, failing_stage):
+
+        def blocks(_size):
+            for number in range(100):
+                if failing_stage == 'reader' and number == 50:
+                    raise OSError('reader')
+                yield b'abc'
+
+        reader = MagicMock(read_blocks=blocks)
+        writer = MagicMock()
+        coder = Xor(ScalarEncryptionKey(3))
+        if failing_stage == 'writer':
+            writer.write.side_effect = OSError('writer')
+        if failing_stage == 'coder':
+            coder = MagicMock(encode_block_into=MagicMock(side_effect=OSError('coder')))
+
+        with pytest.raises(OSError) as error:
+            PipelinedEncoder(reader, writer, coder, 3, 2).encode()
+
+        assert error.value.args == (failing_stage,)
+
+    def test_file_is_pipelined_from_command_line(self, tmp_path):
+
+        in_path = tmp_path / 'in_file.txt'
+        out_path = tmp_path / 'out_file.txt'
+        in_path.write_bytes(self.TEXT.encode('latin-1'))
+
+        with patch('sys.argv', ['main', '--in_file={}'.format(in_path),
+                                '--out_file={}'.format(out_path), '--xor', '--key_text=secret',
+                                '--block_size=16', '--pipeline_depth=2']):
+            main()
+
+        assert out_path.read_bytes().decode('latin-1') == \
+            self._serial(Xor(IterableEncryptionKey('secret')))
+
+    @pytest.mark.parametrize('queue_depth', [0, -1])
+    def test_queue_depth_below_one_is_rejected(self, queue_depth):
+
+        with pytest.raises(ValueError):
+            PipelinedEncoder(StringReader(self.TEXT), StringWriter(),
+                             Xor(ScalarEncryptionKey(3)), 7, queue_depth)
+
+    @pytest.mark.parametrize('options, message', [
+        (['--pipeline_depth=0'], 'Pipeline depth shall be at least 1.'),
+        (['--pipeline_depth=-1'], 'Pipeline depth shall be at least 1.'),
+        (['--pipeline_depth=2', '--headed'],
+         'Pipelined mode cannot encode headed input or records.'),
+        (['--pipeline_depth=2', '--record_delimiter=\\n\\n'],
+         'Pipelined mode cannot encode headed input or records.'),
+        (['--pipeline_depth=2', '--workers=2'],
+         'Pipelined mode cannot be combined with parallel or checkpointed mode.'),
+        (['--pipeline_depth=2', '--checkpoint'],
+         'Pipelined mode cannot be combined with parallel or checkpointed mode.')])
+    def test_runtime_error_raised_for_invalid_pipelined_mode(self, tmp_path, options, message):
+
+        in_path = tmp_path / 'in_file.txt'
+        in_path.write_bytes(self.TEXT.encode('latin-1'))
+
+        with patch('sys.argv', ['main', '--in_file={}'.format(in_path),
+                                '--out_file={}'.format(tmp_path / 'out_file.txt'), '--xor',
+                                '--key=3'] + options):
+            with pytest.raises(RuntimeError) as error:
+                main()
+
+        assert error.value.args == (message,)
+
+
+class TestAsyncEncoder:
+
+    class StreamWriterStub:
+
+        def __init__(self):
+            self.output = []
+            self.is_eof_written = False
+
+        def write(self, data):
+            self.output.append(data)
+
+        async def drain(self):
+            pass
+
+        @staticmethod
+        def can_write_eof():
+            return True
+
+        def write_eof(self):
+            self.is_eof_written = True
+
+    @staticmethod
+    async def _encode(data, coder, block_size):
+        stream_reader = asyncio.StreamReader()
+        stream_reader.feed_data(data)
+        stream_reader.feed_eof()
+        stream_writer = TestAsyncEncoder.StreamWriterStub()
+        encoder = AsyncEncoder(AsyncStreamReader(stream_reader), AsyncStreamWriter(stream_writer),
+                               coder, block_size)
+        await encoder.encode()
+        return stream_writer
+
+    def test_stream_is_encoded_in_blocks(self):
+
+        stream_writer = asyncio.run(self._encode(b'test me', Cesar(ScalarEncryptionKey(2)), 3))
+
+        assert stream_writer.output == [b'vgu', b'v"o', b'g']
+        assert stream_writer.is_eof_written
+
+    def test_concurrent_streams_are_encoded_independently(self):
+
+        async def encode_all():
+            return await asyncio.gather(*[
+                self._encode(b'test me' * 10, Xor(IterableEncryptionKey([1, 2, 3])), 4)
+                for _ in range(1000)])
+
+        expected = Xor(IterableEncryptionKey([1, 2, 3])).encode_block(b'test me' * 10)
+
+        for stream_writer in asyncio.run(encode_all()):
+            assert b''.join(stream_writer.output) == expected
+
+    def test_encoding_over_tcp_connection(self):
+
+        async def serve_and_request():
+            async def handle(reader, writer):
+                await AsyncEncoder(AsyncStreamReader(reader), AsyncStreamWriter(writer),
+                                   Xor(ScalarEncryptionKey(3))).encode()
+                writer.close()
+
+            server = await asyncio.start_server(handle, '127.0.0.1', 0)
+            async with server:
+                reader, writer = await asyncio.open_connection(
+                    *server.sockets[0].getsockname()[:2])
+                writer.write(b'test me')
+                writer.write_eof()
+                response = await reader.read()
+                writer.close()
+                return response
+
+        assert asyncio.run(serve_and_request()) == b'wfpw#nf'
+
+
+class TestMainStreams:
+
+    @pytest.fixture()
+    def sysargv_stdin_stdout_mock(self):
+        with patch('sys.argv', ['main', '--in_stdin', '--out_stdout', '--xor', '--key=3']):
+            with patch('sys.stdin', MagicMock(buffer=BytesIO(b'test me\xe9'))):
+                yield
+
+    def test_stdin_is_xor_encoded_to_stdout(self, sysargv_stdin_stdout_mock, capsysbinary):
+
+        main()
+        out, _ = capsysbinary.readouterr()
+
+        assert out == b'wfpw#nf\xea'
+
+    @pytest.fixture()
+    def sysargv_headed_stdin_mock(self):
+        with patch('sys.argv', ['main', '--in_stdin', '--out_stdout', '--cesar', '--key=1',
+                                '--headed']):
+            with patch('sys.stdin', MagicMock(buffer=BytesIO(b'head\nabc'))):
+                yield
+
+    def test_headed_stdin_is_cesar_encoded_to_stdout(self, sysargv_headed_stdin_mock,
+                                                     capsysbinary):
+
+        main()
+        out, _ = capsysbinary.readouterr()
+
+        assert out == b'head\nbcd'
+
+
+class TestMainMmap:
+
+    @pytest.fixture()
+    def files(self, tmp_path):
+        self.in_path = tmp_path / 'in_file.txt'
+        self.out_path = tmp_path / 'out_file.txt'
+        self.in_path.write_bytes(b'header\ntest me')
+        yield
+
+    def test_file_is_encoded_to_file_with_mmap(self, files):
+
+        with patch('sys.argv', ['main', '--in_file={}'.format(self.in_path),
+                                '--out_file={}'.format(self.out_path),
+                                '--cesar', '--key=2', '--mmap']):
+            main()
+
+        assert self.out_path.read_bytes() == b'jgcfgt\nvguv"og'
+
+    def test_headed_file_is_encoded_to_file_with_mmap(self, files):
+
+        with patch('sys.argv', ['main', '--in_file={}'.format(self.in_path),
+                                '--out_file={}'.format(self.out_path),
+                                '--xor', '--key=3', '--mmap', '--headed']):
+            main()
+
+        assert self.out_path.read_bytes() == b'header\nwfpw#nf'
+
+    def test_runtime_error_raised_if_mmap_has_no_output_file(self, files):
+
+        with patch('sys.argv', ['main', '--in_file={}'.format(self.in_path),
+                                '--out_console', '--xor', '--key=3', '--mmap']):
+            with pytest.raises(RuntimeError) as error:
+                main()
+
+        assert 'Memory mapped mode needs input and output file.' in error.value.args
+
+
+class TestMainFiles:
+
+    @pytest.fixture()
+    def files(self, tmp_path):
+        self.in_path = tmp_path / 'in_file.txt'
+        self.out_path = tmp_path / 'out_file.txt'
+        self.mmap_path = tmp_path / 'mmap_file.txt'
+        self.in_path.write_bytes(b'header\xe9\ntest me\xe9' * 3)
+        yield
+
+    @pytest.mark.parametrize('key', ['--key=3', '--key_text=abc'])
+    def test_file_bytes_are_encoded_like_with_mmap(self, files, key):
+
+        with patch('sys.argv', ['main', '--in_file={}'.format(self.in_path),
+                                '--out_file={}'.format(self.out_path),
+                                '--xor', key, '--block_size=4']):
+            main()
+        with patch('sys.argv', ['main', '--in_file={}'.format(self.in_path),
+                                '--out_file={}'.format(self.mmap_path),
+                                '--xor', key, '--mmap']):
+            main()
+
+        assert self.out_path.read_bytes() == self.mmap_path.read_bytes()
+
+    def test_headed_file_bytes_are_encoded(self, files):
+
+        with patch('sys.argv', ['main', '--in_file={}'.format(self.in_path),
+                                '--out_file={}'.format(self.out_path),
+                                '--xor', '--key=3', '--headed', '--block_size=4']):
+            main()
+
+        assert self.out_path.read_bytes()[:8] == b'header\xe9\n'
+        assert self.out_path.read_bytes()[8:15] == b'wfpw#nf'
+
+    def test_compressed_file_is_encoded_to_compressed_file(self, files, tmp_path):
+
+        compressed_in_path = tmp_path / 'in_file.txt.gz'
+        compressed_out_path = tmp_path / 'out_file.txt.xz'
+        compressed_in_path.write_bytes(gzip.compress(self.in_path.read_bytes()))
+        with patch('sys.argv', ['main', '--in_file={}'.format(self.in_path),
+                                '--out_file={}'.format(self.out_path),
+                                '--xor', '--key_text=abc', '--headed']):
+            main()
+        with patch('sys.argv', ['main', '--in_file={}'.format(compressed_in_path),
+                                '--out_file={}'.format(compressed_out_path),
+                                '--xor', '--key_text=abc', '--headed']):
+            main()
+
+        assert lzma.decompress(compressed_out_path.read_bytes()) == self.out_path.read_bytes()
+
+    def test_plain_file_starting_like_bz2_is_encoded_as_is(self, files, tmp_path):
+
+        in_path = tmp_path / 'in_file.txt'
+        in_path.write_bytes(b'BZh hello')
+        with patch('sys.argv', ['main', '--in_file={}'.format(in_path),
+                                '--out_file={}'.format(self.out_path), '--xor', '--key=3']):
+            main()
+
+        assert self.out_path.read_bytes() == bytes(code ^ 3 for code in b'BZh hello')
+
+    def test_input_compression_can_be_turned_off(self, files, tmp_path):
+
+        compressed_in_path = tmp_path / 'in_file.txt.gz'
+        compressed_in_path.write_bytes(gzip.compress(self.in_path.read_bytes()))
+        with patch('sys.argv', ['main', '--in_file={}'.format(compressed_in_path),
+                                '--out_file={}'.format(self.out_path), '--xor', '--key=3',
+                                '--in_compression=none', '--mmap']):
+            main()
+
+        assert self.out_path.read_bytes() == bytes(code ^ 3
+                                                   for code in compressed_in_path.read_bytes())
+
+    def test_runtime_error_raised_if_compressed_file_is_memory_mapped(self, files, tmp_path):
+
+        with patch('sys.argv', ['main', '--in_file={}'.format(self.in_path),
+                                '--out_file={}'.format(tmp_path / 'out_file.gz'),
+                                '--xor', '--key=3', '--mmap']):
+            with pytest.raises(RuntimeError) as error:
+                main()
+
+        assert 'Compressed files can only be encoded as streams.' in error.value.args
+
+
+class TestMainProfiling:
+
+    def test_encoding_is_profiled_to_pstats_file(self, tmp_path, capsys):
+
+        stats_path = tmp_path / 'encode.prof'
+        with patch('sys.argv', ['main', '--in_string=test me', '--out_console', '--xor',
+                                '--key=3', '--profile={}'.format(stats_path),
+                                '--profile_top=5']):
+            main()
+        out, err = capsys.readouterr()
+
+        assert out == 'wfpw#nf'
+        assert 'Ordered by: internal time' in err
+        assert pstats.Stats(str(stats_path)).total_calls > 0
+
+    def test_allocations_are_traced_to_snapshot_file(self, tmp_path, capsys):
+
+        snapshot_path = tmp_path / 'encode.snapshot'
+        with patch('sys.argv', ['main', '--in_string=test me', '--out_console', '--xor',
+                                '--key=3', '--tracemalloc={}'.format(snapshot_path)]):
+            main()
+        out, err = capsys.readouterr()
+
+        assert out == 'wfpw#nf'
+        assert 'size=' in err
+        assert tracemalloc.Snapshot.load(str(snapshot_path)).traces
+
+
+class TestMainBatch:
+
+    @pytest.fixture()
+    def files(self, tmp_path):
+        self.in_dir = tmp_path / 'in'
+        self.out_dir = tmp_path / 'out'
+        (self.in_dir / 'sub').mkdir(parents=True)
+        (self.in_dir / 'a.txt').write_bytes(b'test me')
+        (self.in_dir / 'sub' / 'b.txt').write_bytes(b'test me too')
+        yield
+
+    def test_files_are_encoded_with_fresh_keys_into_output_directory(self, files):
+
+        with patch('sys.argv', ['main', '--in_files', str(self.in_dir / 'a.txt'),
+                                str(self.in_dir / 'sub' / 'b.txt'),
+                                '--out_dir={}'.format(self.out_dir),
+                                '--cesar', '--key_text=abc', '--workers=2']):
+            main()
+
+        assert (self.out_dir / 'a.txt').read_bytes() == b'vhwv#qg'
+        assert (self.out_dir / 'sub' / 'b.txt').read_bytes() == b'vhwv#qg#xqr'
+
+    def test_glob_and_manifest_files_are_encoded(self, files, tmp_path):
+
+        manifest = tmp_path / 'manifest.txt'
+        manifest.write_text('{}\n\n'.format(self.in_dir / 'sub' / 'b.txt'))
+
+        with patch('sys.argv', ['main', '--in_glob={}'.format(self.in_dir / '*.txt'),
+                                '--in_manifest={}'.format(manifest),
+                                '--out_dir={}'.format(self.out_dir), '--xor', '--key=3']):
+            main()
+
+        assert (self.out_dir / 'a.txt').read_bytes() == b'wfpw#nf'
+        assert (self.out_dir / 'sub' / 'b.txt').read_bytes() == b'wfpw#nf#wll'
+
+    def test_failed_file_is_reported_without_stopping_batch(self, files, caplog):
+
+        caplog.set_level(logging.INFO)
+        missing_path = self.in_dir / 'missing.txt'
+        with patch('sys.argv', ['main', '--in_files', str(self.in_dir / 'a.txt'),
+                                str(missing_path), str(self.in_dir / 'sub' / 'b.txt'),
+                                '--out_dir={}'.format(self.out_dir), '--xor', '--key=3']):
+            with pytest.raises(SystemExit) as exit_info:
+                main()
+
+        assert exit_info.value.code == 1
+        assert (self.out_dir / 'a.txt').read_bytes() == b'wfpw#nf'
+        assert (self.out_dir / 'sub' / 'b.txt').read_bytes() == b'wfpw#nf#wll'
+        assert 'Batch of 3 files, 18 bytes' in caplog.text
+        assert '1 failed.' in caplog.text
+        assert 'Encoding {} failed: FileNotFoundError'.format(missing_path) in caplog.text
+
+    def test_runtime_error_raised_if_batch_has_no_output_directory(self, files):
+
+        with patch('sys.argv', ['main', '--in_files', str(self.in_dir / 'a.txt'),
+                                '--out_console', '--xor', '--key=3']):
+            with pytest.raises(RuntimeError) as error:
+                main()
+
+        assert 'Batch mode needs output directory.' in error.value.args
+
+
 class TestObservable:
 
     """Test Encoding Done Observable"""
@@ -0,0 +1,150 @@
+"""Test encoding metrics."""
+# pylint: disable=missing-function-docstring
+# pylint: disable=missing-class-docstring
+# pylint: disable=no-self-use
+# pylint: disable=unused-argument
+# pylint: disable=attribute-defined-outside-init
+
+import json
+import logging
+
+from mock import patch
+import pytest
+
+from text_encoder import Encoder, Xor, ScalarEncryptionKey, StringReader, StringWriter
+from text_encoder import DelimitedHeadedEncoder, RecordEncoder, ParallelEncoder, PipelinedEncoder
+from text_encoder import LoggingSink, JsonLinesSink, InMemorySink, set_metrics_sinks
+from text_encoder.__main__ import main
+from text_encoder._utils import time_it
+
+
+def _answer():
+    return 42
+
+
+@pytest.fixture()
+def in_memory_sink():
+    sink = InMemorySink()
+    set_metrics_sinks(sink)
+    yield sink
+    set_metrics_sinks(LoggingSink())
+
+
+class TestTimeIt:
+
+    def test_return_value_is_kept(self, in_memory_sink):
+
+        assert time_it(_answer)() == 42
+        assert in_memory_sink.records[0]['name'] == '_answer'
+        assert in_memory_sink.records[0]['elapsed_ns'] >= 0
+
+    def test_metrics_are_reported_when_function_raises(self, in_memory_sink):
+
+        def fail():
+            raise ValueError()
+
+        with pytest.raises(ValueError):
+            time_it(fail)()
+
+        assert [record['name'] for record in in_memory_sink.records] == [
+            'TestTimeIt.test_metrics_are_reported_when_function_raises.<locals>.fail']
+
+
+class TestEncoderMetrics:
+
+    def test_block_phases_and_bytes_are_counted(self, in_memory_sink):
+
+        Encoder(StringReader('test me'), StringWriter(), Xor(ScalarEncryptionKey(3)),
+                block_size=3).encode()
+        record = in_memory_sink.records[0]
+
+        assert record['name'] == 'Encoder.encode'
+        assert (record['bytes_in'], record['bytes_out'], record['blocks']) == (7, 7, 3)
+        assert set(record['phases_ns']) == {'read', 'encode', 'write'}
+        assert all(elapsed_ns > 0 for elapsed_ns in record['phases_ns'].values())
+
+    @pytest.mark.parametrize('get_encoder, name', [
+        (lambda reader, writer, coder: DelimitedHeadedEncoder(reader, writer, coder, '\n',
+                                                              block_size=3),
+         'DelimitedHeadedEncoder.encode'),
+        (lambda reader, writer, coder: RecordEncoder(reader, writer, coder, '\n\n', '\n',
+                                                     block_size=3),
+         'RecordEncoder.encode')])
+    def test_delimited_encoder_phases_and_bytes_are_counted(self, in_memory_sink, get_encoder,
+                                                             name):
+
+        get_encoder(StringReader('h\ntest\n\nh\nme'), StringWriter(),
+                    Xor(ScalarEncryptionKey(3))).encode()
+        record = in_memory_sink.records[0]
+
+        assert record['name'] == name
+        assert (record['bytes_in'], record['bytes_out'], record['blocks']) == (12, 12, 4)
+        assert all(elapsed_ns > 0 for elapsed_ns in record['phases_ns'].values())
+
+    def test_pipelined_encoder_is_reported_under_its_name(self, in_memory_sink):
+
+        PipelinedEncoder(StringReader('test me'), StringWriter(), Xor(ScalarEncryptionKey(3)),
+                         block_size=3).encode()
+
+        assert [record['name'] for record in in_memory_sink.records] == [
+            'PipelinedEncoder.encode']
+        assert in_memory_sink.records[0]['bytes_out'] == 7
+
+    def test_parallel_encoder_collects_metrics_of_workers(self, in_memory_sink, tmp_path):
+
+        in_path = tmp_path / 'in_file.txt'
+        in_path.write_bytes(b'header\ntest me' * 10)
+        ParallelEncoder(str(in_path), str(tmp_path / 'out_file.txt'), Xor, ScalarEncryptionKey(3),
+                        workers=1, header_delimiter=b'\n', range_size=16).encode()
+        record = in_memory_sink.records[0]
+
+        assert record['name'] == 'ParallelEncoder.encode'
+        assert record['bytes_in'] == record['bytes_out'] == 140
+        assert record['blocks'] == 10
+        assert all(elapsed_ns > 0 for elapsed_ns in record['phases_ns'].values())
+
+    def test_chars_are_counted_until_stop(self, in_memory_sink):
+
+        Encoder(StringReader('test me'), StringWriter(),
+                Xor(ScalarEncryptionKey(3))).encode(lambda x: x == ' ')
+        record = in_memory_sink.records[0]
+
+        assert (record['bytes_in'], record['bytes_out'], record['blocks']) == (5, 5, 0)
+
+
+class TestSinks:
+
+    def test_logging_sink_logs_time_and_phases(self, caplog):
+
+        set_metrics_sinks(LoggingSink())
+        with caplog.at_level(logging.INFO):
+            Encoder(StringReader('test me'), StringWriter(), Xor(ScalarEncryptionKey(3)),
+                    block_size=3).encode()
+
+        assert 'Encoder.encode complete in' in caplog.text
+        assert '7 bytes in, 7 bytes out' in caplog.text
+
+    def test_json_lines_sink_appends_records(self, tmp_path):
+
+        path = tmp_path / 'metrics.jsonl'
+        set_metrics_sinks(JsonLinesSink(str(path)))
+        try:
+            for _ in range(2):
+                time_it(_answer)()
+        finally:
+            set_metrics_sinks(LoggingSink())
+
+        records = [json.loads(line) for line in path.read_text().splitlines()]
+        assert [record['name'] for record in records] == ['_answer', '_answer']
+
+    def test_metrics_file_is_written_from_command_line(self, tmp_path):
+
+        path = tmp_path / 'metrics.jsonl'
+        with patch('sys.argv', ['main', '--in_string=test me', '--out_console', '--xor',
+                                '--key=3', '--metrics_file={}'.format(path)]):
+            try:
+                main()
+            finally:
+                set_metrics_sinks(LoggingSink())
+
+        assert json.loads(path.read_text())['bytes_in'] == 7
@@ -6,11 +6,20 @@
 # pylint: disable=unused-argument
 # pylint: disable=attribute-defined-outside-init
 
+import bz2
+import gzip
+from io import BytesIO
+import lzma
+
 from mock import patch, mock_open, MagicMock
 import pytest
 
 from text_encoder import (StringReader, StringWriter, FileReader,
                           FileWriter, ConsoleReader, ConsoleWriter)
+from text_encoder import NoSync, SyncEveryBytes, SyncEverySeconds
+from text_encoder import MmapFileReader, MmapFileWriter, StdinReader, StdoutWriter
+from text_encoder import CompressedFileReader, CompressedFileWriter
+from text_encoder._compression import detect_compression
 
 
 class TestStringReader:
@@ -22,6 +31,21 @@ class TestStringReader:
 
         assert read_text == 'test'
 
+    def test_string_read_blocks_returns_slices(self):
+
+        _string = StringReader('test me')
+
+        assert list(_string.read_blocks(3)) == ['tes', 't m', 'e']
+
+    def test_string_read_blocks_continues_after_read_chars(self):
+
+        _string = StringReader('test me')
+        chars = _string.read()
+        first = next(chars) + next(chars)
+
+        assert first == 'te'
+        assert list(_string.read_blocks(4)) == ['st m', 'e']
+
 
 class TestStringWriter:
 
@@ -33,6 +57,14 @@ class TestStringWriter:
 
         assert wrote_text == 'a'
 
+    def test_string_writer_decodes_bytes_as_latin1(self):
+
+        writer = StringWriter()
+        writer.write(b'a\xe9')
+        writer.write(memoryview(b'b'))
+
+        assert writer.get() == 'a\xe9b'
+
 
 class TestFileReader:
 
@@ -51,6 +83,39 @@ class TestFileReader:
 
         assert read_text == 'test'
 
+    def test_file_read_blocks_are_sliced_from_buffer(self, tmp_path):
+
+        path = tmp_path / 'input.txt'
+        path.write_bytes(b'test me\xe9')
+        _file = FileReader(str(path), buffer_size=5)
+
+        assert list(_file.read_blocks(3)) == ['tes', 't m', 'e\xe9']
+
+    def test_file_read_chars_and_blocks_share_position(self, tmp_path):
+
+        path = tmp_path / 'input.txt'
+        path.write_bytes(b'test me')
+        _file = FileReader(str(path), buffer_size=4)
+        chars = _file.read()
+        first = next(chars) + next(chars)
+
+        assert first == b'te'
+        assert list(_file.read_blocks(2)) == ['st', ' m', 'e']
+        assert list(chars) == []
+
+    def test_binary_file_blocks_are_read_into_reused_buffer(self, tmp_path):
+
+        path = tmp_path / 'input.txt'
+        path.write_bytes(b'test me\xe9')
+        blocks = FileReader(str(path), binary=True).read_blocks(3)
+        first = next(blocks)
+
+        assert first == b'tes'
+        second = next(blocks)
+        assert second == b't m'
+        assert second.obj is first.obj
+        assert list(blocks) == [b'e\xe9']
+
 
 class TestFileWriter:
 
@@ -70,6 +135,125 @@ class TestFileWriter:
 
         self.open_mock.return_value.write.assert_called_once_with('a')
 
+    def test_binary_file_is_written_in_bytes(self, tmp_path):
+
+        path = tmp_path / 'output.txt'
+        _file = FileWriter(str(path), binary=True)
+        _file.write(memoryview(b'test\xe9'))
+        _file.write(' me\xe9')
+        _file.finish()
+
+        assert path.read_bytes() == b'test\xe9 me\xe9'
+
+    def test_bytes_are_written_to_text_file_as_latin1(self, tmp_path):
+
+        path = tmp_path / 'output.txt'
+        _file = FileWriter(str(path))
+        _file.write(b'\xe9')
+        _file.finish()
+
+        assert path.read_text() == '\xe9'
+
+    @pytest.fixture()
+    def fsync_mock_set(self):
+
+        with patch('builtins.open', new_callable=mock_open) as self.open_mock:
+            self.open_mock.return_value.fileno.return_value = int(1)
+            with patch('text_encoder._readers_writers.fsync') as self.fsync_mock:
+                yield
+
+    def test_file_is_synced_once_on_finish_by_default(self, fsync_mock_set):
+
+        _file = FileWriter('path')
+        _file.write('a')
+        _file.write('b')
+
+        self.fsync_mock.assert_not_called()
+        _file.finish()
+        self.fsync_mock.assert_called_once_with(1)
+        self.open_mock.return_value.close.assert_called_once()
+
+    def test_file_is_not_synced_with_no_sync_policy(self, fsync_mock_set):
+
+        _file = FileWriter('path', NoSync())
+        _file.write('a')
+        _file.finish()
+
+        self.fsync_mock.assert_not_called()
+        self.open_mock.return_value.close.assert_called_once()
+
+    def test_file_is_synced_every_bytes(self, fsync_mock_set):
+
+        _file = FileWriter('path', SyncEveryBytes(3))
+        for char in 'abcdefg':
+            _file.write(char)
+
+        assert self.fsync_mock.call_count == 2
+
+    def test_file_is_synced_every_seconds(self, fsync_mock_set):
+
+        with patch('text_encoder._readers_writers.monotonic', side_effect=[0, 1, 5, 6]):
+            _file = FileWriter('path', SyncEverySeconds(5))
+            _file.write('a')
+            self.fsync_mock.assert_not_called()
+            _file.write('b')
+            self.fsync_mock.assert_called_once_with(1)
+            _file.write('c')
+
+        self.fsync_mock.assert_called_once_with(1)
+
+
+class TestMmapFileReader:
+
+    def test_mmap_read_blocks_returns_bytes(self, tmp_path):
+
+        path = tmp_path / 'input.txt'
+        path.write_bytes(b'test me')
+        _file = MmapFileReader(str(path))
+
+        assert _file.size == 7
+        assert list(_file.read_blocks(3)) == [b'tes', b't m', b'e']
+
+    def test_mmap_read_chars_and_blocks_share_position(self, tmp_path):
+
+        path = tmp_path / 'input.txt'
+        path.write_bytes(b'test me')
+        _file = MmapFileReader(str(path))
+        chars = _file.read()
+
+        assert next(chars) == b't'
+        assert list(_file.read_blocks()) == [b'est me']
+        assert list(chars) == []
+
+    def test_mmap_read_of_empty_file_returns_nothing(self, tmp_path):
+
+        path = tmp_path / 'input.txt'
+        path.write_bytes(b'')
+
+        assert list(MmapFileReader(str(path)).read_blocks()) == []
+
+
+class TestMmapFileWriter:
+
+    def test_mmap_writer_writes_blocks_and_text(self, tmp_path):
+
+        path = tmp_path / 'output.txt'
+        _file = MmapFileWriter(str(path), 7)
+        _file.write(b'test')
+        _file.write(' me')
+        _file.finish()
+
+        assert path.read_bytes() == b'test me'
+
+    def test_mmap_writer_truncates_unwritten_bytes(self, tmp_path):
+
+        path = tmp_path / 'output.txt'
+        _file = MmapFileWriter(str(path), 7)
+        _file.write(b'test')
+        _file.finish()
+
+        assert path.read_bytes() == b'test'
+
 
 class TestConsoleReader:
 
@@ -96,3 +280,160 @@ class TestConsoleWriter:
         out, _ = capsys.readouterr()
 
         assert out == 'A'
+
+    def test_console_writer_decodes_bytes_as_latin1(self, capsys):
+
+        _console_out = ConsoleWriter()
+        _console_out.write(b'B\xe9')
+
+        out, _ = capsys.readouterr()
+
+        assert out == 'B\xe9'
+
+
+class TestStdinReader:
+
+    @pytest.fixture()
+    def stdin_mock_set(self):
+        with patch('sys.stdin', MagicMock(buffer=BytesIO(b'test me\xe9'))):
+            yield
+
+    def test_stdin_read_blocks_returns_latin1_text(self, stdin_mock_set):
+
+        _stdin = StdinReader()
+
+        assert list(_stdin.read_blocks(4)) == ['test', ' me\xe9']
+
+    def test_stdin_read_returns_bytes(self, stdin_mock_set):
+
+        _stdin = StdinReader()
+
+        assert b''.join(_stdin.read()) == b'test me\xe9'
+
+
+class TestStdoutWriter:
+
+    def test_stdout_write_prints_out_bytes_and_text(self, capsysbinary):
+
+        _stdout = StdoutWriter()
+        _stdout.write(b'test')
+        _stdout.write(' me\xe9')
+        _stdout.finish()
+
+        out, _ = capsysbinary.readouterr()
+
+        assert out == b'test me\xe9'
+
+
+COMPRESSORS = {'gzip': gzip.compress, 'bz2': bz2.compress, 'xz': lzma.compress}
+DECOMPRESSORS = {'gzip': gzip.decompress, 'bz2': bz2.decompress, 'xz': lzma.decompress}
+
+
+class TestCompressedFileReader:
+
+    TEXT = b'test me\xe9' * 1000
+
+    @pytest.mark.parametrize('compression', list(COMPRESSORS))
+    def test_compression_is_detected_from_magic_bytes(self, tmp_path, compression):
+
+        path = tmp_path / 'file.bin'
+        path.write_bytes(COMPRESSORS[compression](self.TEXT))
+
+        assert detect_compression(str(path)) == compression
+        reader = CompressedFileReader(str(path), buffer_size=100, binary=True)
+        assert b''.join(bytes(block) for block in reader.read_blocks(64)) == self.TEXT
+
+    def test_compression_is_detected_from_extension(self, tmp_path):
+
+        path = tmp_path / 'file.lzma'
+        path.write_bytes(lzma.compress(self.TEXT, format=lzma.FORMAT_ALONE))
+
+        assert detect_compression(str(path)) == 'xz'
+        assert ''.join(CompressedFileReader(str(path)).read_blocks(7)) == \
+            self.TEXT.decode('latin-1')
+
+    @pytest.mark.parametrize('data, compression', [
+        (b'BZh hello', None), (b'BZh91AY&SX', None), (bz2.compress(b''), 'bz2')])
+    def test_bz2_is_detected_from_header_and_block_magic(self, tmp_path, data, compression):
+
+        path = tmp_path / 'file.txt'
+        path.write_bytes(data)
+
+        assert detect_compression(str(path)) == compression
+
+    def test_not_compressed_file_is_read_as_is(self, tmp_path):
+
+        path = tmp_path / 'file.txt'
+        path.write_bytes(self.TEXT)
+
+        assert detect_compression(str(path)) is None
+        assert b''.join(CompressedFileReader(str(path)).read()) == self.TEXT
+
+    def test_decompression_error_is_raised_to_reader(self, tmp_path):
+
+        path = tmp_path / 'file.gz'
+        path.write_bytes(gzip.compress(self.TEXT)[:-20])
+
+        with pytest.raises(EOFError):
+            list(CompressedFileReader(str(path), buffer_size=100).read_blocks(64))
+
+    def test_decompression_is_stopped_when_reading_is_abandoned(self, tmp_path):
+
+        path = tmp_path / 'file.gz'
+        path.write_bytes(gzip.compress(self.TEXT))
+        reader = CompressedFileReader(str(path), buffer_size=10, queue_depth=1)
+        next(reader.read_blocks(5))
+        read_ahead_file = reader._file  # pylint: disable=protected-access
+
+        reader._close_file()  # pylint: disable=protected-access
+
+        assert not read_ahead_file._thread.is_alive()  # pylint: disable=protected-access
+
+
+class TestCompressedFileWriter:
+
+    @pytest.mark.parametrize('compression', list(DECOMPRESSORS))
+    def test_blocks_are_compressed_with_extension_compression(self, tmp_path, compression):
+
+        extension = {'gzip': 'gz', 'bz2': 'bz2', 'xz': 'xz'}[compression]
+        path = tmp_path / 'file.{}'.format(extension)
+        writer = CompressedFileWriter(str(path), buffer_size=16)
+        buffer = bytearray(b'test')
+        writer.write(memoryview(buffer))
+        buffer[:] = b'XXXX'
+        writer.write(' me\xe9' * 10)
+        writer.write(b'!')
+        writer.finish()
+
+        assert DECOMPRESSORS[compression](path.read_bytes()) == b'test' + b' me\xe9' * 10 + b'!'
+
+    @pytest.mark.parametrize('compression', list(DECOMPRESSORS))
+    def test_whole_compressed_file_is_on_disk_when_synced(self, tmp_path, compression):
+
+        path = tmp_path / 'file.out'
+        synced = []
+        writer = CompressedFileWriter(str(path), compression, buffer_size=16)
+        writer.write(b'test me' * 10)
+        with patch('text_encoder._readers_writers.fsync',
+                   MagicMock(side_effect=lambda _: synced.append(path.read_bytes()))):
+            writer.finish()
+
+        assert len(synced) == 1
+        assert DECOMPRESSORS[compression](synced[0]) == b'test me' * 10
+
+    def test_compression_can_be_given(self, tmp_path):
+
+        path = tmp_path / 'file.out'
+        writer = CompressedFileWriter(str(path), 'bz2', NoSync())
+        writer.write(b'test me')
+        writer.finish()
+
+        assert bz2.decompress(path.read_bytes()) == b'test me'
+
+    def test_missing_zstandard_is_reported(self, tmp_path):
+
+        with patch.dict('sys.modules', {'zstandard': None}):
+            with pytest.raises(RuntimeError) as error:
+                CompressedFileWriter(str(tmp_path / 'file.zst'))
+
+        assert error.value.args == ('zstd compression needs zstandard package.',)
@@ -0,0 +1,86 @@
+"""Test codec registry."""
+# pylint: disable=too-few-public-methods
+# pylint: disable=missing-function-docstring
+# pylint: disable=missing-class-docstring
+# pylint: disable=no-self-use
+
+from mock import patch, Mock
+import pytest
+
+from text_encoder import (Cesar, Xor, IterableEncryptionKey, register_codec, get_codec,
+                          get_codec_names, get_coder)
+from text_encoder import _registry
+
+
+class Rot13(Cesar):
+
+    def __init__(self, key):
+        super().__init__(key)
+        self.created = True
+
+
+@pytest.fixture(autouse=True)
+def restore_codecs():
+    codecs = dict(_registry._codecs)  # pylint: disable=protected-access
+    yield
+    _registry._codecs.clear()  # pylint: disable=protected-access
+    _registry._codecs.update(codecs)  # pylint: disable=protected-access
+    _registry._get_prepared_coder.cache_clear()  # pylint: disable=protected-access
+
+
+class TestRegistry:
+
+    def test_builtin_codecs_are_registered(self):
+        assert get_codec('cesar') is Cesar
+        assert get_codec('xor') is Xor
+
+    def test_registered_codec_is_found_by_name(self):
+        register_codec('rot13', Rot13)
+        assert get_codec('rot13') is Rot13
+        assert 'rot13' in get_codec_names()
+        assert isinstance(get_coder('rot13', 13), Rot13)
+
+    def test_unknown_codec_raises(self):
+        with pytest.raises(ValueError) as error:
+            get_codec('rot13')
+        assert error.value.args == ("Unknown codec 'rot13'.",)
+
+    def test_codec_is_loaded_from_entry_point(self):
+        entry_point = Mock(load=Mock(return_value=Rot13))
+        entry_point.name = 'rot13'
+        with patch.object(_registry, '_codecs', {'cesar': Cesar}):
+            _registry._load_entry_points.cache_clear()  # pylint: disable=protected-access
+            with patch('importlib.metadata.entry_points') as entry_points:
+                entry_points.return_value.select.return_value = [entry_point]
+                assert get_codec('rot13') is Rot13
+            entry_points.return_value.select.assert_called_once_with(group='text_encoder.codecs')
+        _registry._load_entry_points.cache_clear()  # pylint: disable=protected-access
+
+
+class TestGetCoder:
+
+    def test_coder_is_prepared_once_per_codec_and_key(self):
+        with patch.object(_registry, 'get_codec', return_value=Xor) as codec:
+            get_coder('xor', 'key')
+            get_coder('xor', 'key')
+            get_coder('xor', [1, 2])
+            get_coder('xor', (1, 2))
+        assert codec.call_count == 2
+
+    def test_coders_have_independent_key_streams(self):
+        first = get_coder('xor', [1, 2, 3])
+        assert first.encode_block(b'\x00\x00') == b'\x01\x02'
+        second = get_coder('xor', [1, 2, 3])
+        assert second.encode_block(b'\x00') == b'\x01'
+        assert first.encode_block(b'\x00') == b'\x03'
+
+    def test_coder_encodes_like_new_coder(self):
+        data = 'Some text to encode.' * 10
+        expected = Cesar(IterableEncryptionKey('secret')).encode_block(data)
+        get_coder('cesar', 'secret').encode_block(data)
+        assert get_coder('cesar', 'secret').encode_block(data) == expected
+
+    def test_registering_codec_drops_prepared_coders(self):
+        get_coder('cesar', 3)
+        register_codec('cesar', Rot13)
+        assert isinstance(get_coder('cesar', 3), Rot13)
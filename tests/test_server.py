@@ -0,0 +1,181 @@
+"""Test encoding server."""
+# pylint: disable=too-few-public-methods
+# pylint: disable=missing-function-docstring
+# pylint: disable=missing-class-docstring
+# pylint: disable=no-self-use
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import json
+import socket
+
+from mock import patch, MagicMock, AsyncMock
+import pytest
+
+from text_encoder.__main__ import main
+from text_encoder._metrics import LoggingSink, JsonLinesSink
+from text_encoder._server import EncodingServer, EncodingClient, encode_request
+from text_encoder._server import REQUEST_HEADER, RESPONSE_HEADER, STATUS_OK, STATUS_ERROR
+from text_encoder._server import main as server_main
+
+
+class TestEncodeRequest:
+
+    def test_payload_is_xor_encoded(self):
+
+        assert encode_request({'codec': 'xor', 'key': 3}, b'test me') == b'wfpw#nf'
+
+    def test_payload_is_cesar_encoded_with_text_key(self):
+
+        assert encode_request({'codec': 'cesar', 'key_text': 'abc'}, b'abc') == b'ceg'
+
+    def test_headed_payload_header_is_not_encoded(self):
+
+        result = encode_request({'codec': 'xor', 'key': 3, 'headed': True}, b'aaa\naaa')
+
+        assert result == b'aaa\nbbb'
+
+    def test_runtime_error_raised_if_no_key_provided(self):
+
+        with pytest.raises(RuntimeError) as error:
+            encode_request({'codec': 'xor'}, b'abc')
+
+        assert 'No key nor key_vector provided.' in error.value.args
+
+
+class TestEncodingServer:
+
+    @staticmethod
+    def _serve(client_function, socket_path=None):
+
+        async def serve_and_request():
+            with ThreadPoolExecutor(2) as executor:
+                server = EncodingServer(executor, socket_path=socket_path)
+                await server.start()
+                try:
+                    loop = asyncio.get_running_loop()
+                    return await loop.run_in_executor(None, client_function, server.address)
+                finally:
+                    await server.close()
+
+        return asyncio.run(serve_and_request())
+
+    def test_requests_are_encoded_over_one_connection(self):
+
+        def request(address):
+            with EncodingClient(address) as client:
+                return [client.encode('test me', 'xor', key=3),
+                        client.encode(b'', 'cesar', key=1),
+                        client.encode('header\nabc', 'cesar', headed=True, keys_int='1,2')]
+
+        assert self._serve(request) == [b'wfpw#nf', b'', b'header\nbdd']
+
+    @pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason='Unix sockets not supported')
+    def test_request_is_encoded_over_unix_socket(self, tmp_path):
+
+        def request(address):
+            with EncodingClient(address) as client:
+                return client.encode('test me', 'xor', key=3)
+
+        assert self._serve(request, str(tmp_path / 'encoder.sock')) == b'wfpw#nf'
+
+    def test_error_is_reported_to_client(self):
+
+        def request(address):
+            with EncodingClient(address) as client:
+                with pytest.raises(RuntimeError) as error:
+                    client.encode('test me', 'rot13', key=3)
+                return error.value.args
+
+        assert self._serve(request) == ("Unknown codec 'rot13'.",)
+
+
+def _frame(header, payload, header_size=None, payload_size=None):
+    return REQUEST_HEADER.pack(len(header) if header_size is None else header_size,
+                               len(payload) if payload_size is None else payload_size) + \
+        header + payload
+
+
+class TestEncodingServerFrames:
+
+    XOR_REQUEST = _frame(json.dumps({'codec': 'xor', 'key': 3}).encode(), b'test me')
+
+    @staticmethod
+    def _handle(data, **limits):
+        """Handle connection sending data, get responses and if connection was closed."""
+
+        async def handle():
+            reader = asyncio.StreamReader()
+            reader.feed_data(data)
+            reader.feed_eof()
+            writer = MagicMock(drain=AsyncMock())
+            with ThreadPoolExecutor(1) as executor:
+                server = EncodingServer(executor, **limits)
+                await server._handle_connection(reader, writer)  # pylint: disable=protected-access
+            return b''.join(call[0][0] for call in writer.write.call_args_list), \
+                writer.close.called
+
+        output, is_closed = asyncio.run(handle())
+        responses = []
+        while output:
+            status, body_size = RESPONSE_HEADER.unpack(output[:RESPONSE_HEADER.size])
+            body_end = RESPONSE_HEADER.size + body_size
+            responses.append((status, output[RESPONSE_HEADER.size:body_end]))
+            output = output[body_end:]
+        return responses, is_closed
+
+    def test_malformed_header_is_answered_with_error(self):
+
+        responses, is_closed = self._handle(_frame(b'{not json', b'abc') + self.XOR_REQUEST)
+
+        assert [status for status, _ in responses] == [STATUS_ERROR, STATUS_OK]
+        assert responses[0][1].startswith(b'Malformed request header:')
+        assert responses[1][1] == b'wfpw#nf'
+        assert is_closed
+
+    @pytest.mark.parametrize('data', [
+        REQUEST_HEADER.pack(10, 0)[:5], _frame(b'{"codec"', b'', header_size=20),
+        _frame(b'{}', b'abc', payload_size=10)])
+    def test_truncated_request_closes_connection(self, data):
+
+        assert self._handle(self.XOR_REQUEST + data) == ([(STATUS_OK, b'wfpw#nf')], True)
+
+    @pytest.mark.parametrize('header_size, payload_size', [(11, 0), (0, 11)])
+    def test_too_large_request_is_rejected_without_reading_it(self, header_size, payload_size):
+
+        data = _frame(b'', b'', header_size, payload_size) + self.XOR_REQUEST
+
+        assert self._handle(data, max_header_size=10, max_payload_size=10) == (
+            [(STATUS_ERROR, b'Request is too large.')], True)
+
+
+class TestMainServe:
+
+    def test_serve_command_runs_server(self):
+
+        with patch('sys.argv', ['main', 'serve', '--port=0']):
+            with patch('text_encoder._server.main') as server_main:
+                main()
+
+        server_main.assert_called_once_with(['--port=0'])
+
+    @pytest.mark.parametrize('argv, sink_types', [
+        ([], []), (['--debug'], [LoggingSink]), (['--metrics_file=m.jsonl'], [JsonLinesSink])])
+    def test_requests_are_not_logged_unless_asked_for(self, argv, sink_types):
+
+        with patch('text_encoder._server.asyncio.run') as run:
+            with patch('text_encoder._server.set_metrics_sinks') as set_sinks:
+                with patch('logging.getLogger'):
+                    server_main(argv)
+        run.call_args[0][0].close()
+
+        assert [type(sink) for sink in set_sinks.call_args[0]] == sink_types
+
+    def test_request_size_limits_are_given_to_server(self):
+
+        with patch('text_encoder._server.asyncio.run') as run:
+            with patch('text_encoder._server.EncodingServer') as server:
+                server_main(['--max_header_size=10', '--max_payload_size=20'])
+        run.call_args[0][0].close()
+
+        assert server.call_args[0][4:] == (10, 20)
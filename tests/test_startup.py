@@ -0,0 +1,60 @@
+"""Test package import time."""
+# pylint: disable=missing-function-docstring
+# pylint: disable=missing-class-docstring
+# pylint: disable=no-self-use
+
+import subprocess
+import sys
+
+import pytest
+
+import text_encoder
+
+STARTUP_BUDGET_US = 500000
+HEAVY_MODULES = {'numpy', 'asyncio', 'concurrent.futures', 'cProfile', 'tracemalloc'}
+
+
+def _import_times(statement):
+    """Run statement in a fresh interpreter with -X importtime.
+
+    :return: cumulative import time in microseconds by module name
+    :rtype: dict
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement],
+                            capture_output=True, check=True, text=True)
+    import_times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        import_times[name.strip()] = int(cumulative)
+    return import_times
+
+
+class TestStartup:
+
+    def test_package_import_does_not_import_modules(self):
+
+        import_times = _import_times('import text_encoder')
+
+        assert not [name for name in import_times if name.startswith('text_encoder.')]
+
+    def test_command_line_import_skips_heavy_modules(self):
+
+        import_times = _import_times('import text_encoder.__main__')
+
+        assert not HEAVY_MODULES & set(import_times)
+        assert import_times['text_encoder.__main__'] < STARTUP_BUDGET_US
+
+
+class TestLazyExports:
+
+    def test_exported_name_is_imported_on_first_use(self):
+
+        assert text_encoder.Encoder.__module__ == 'text_encoder._encoders'
+        assert 'Encoder' in dir(text_encoder)
+
+    def test_unknown_name_raises_attribute_error(self):
+
+        with pytest.raises(AttributeError):
+            text_encoder.Unknown  # pylint: disable=pointless-statement
@@ -1,4 +1,38 @@
-from ._encoders import Encoder, NullCoder, HeadedEncoder
-from ._codes import Cesar, Xor, ScalarEncryptionKey, IterableEncryptionKey
-from ._readers_writers import (FileWriter, FileReader, ConsoleWriter,
-                               ConsoleReader, StringWriter, StringReader)
\ No newline at end of file
+"""Text encoder.
+
+Public names are imported from their modules on first use, so importing
+the package alone stays cheap.
+"""
+
+from importlib import import_module
+
+_EXPORTS = {
+    '_encoders': ('Encoder', 'NullCoder', 'HeadedEncoder', 'DelimitedHeadedEncoder',
+                  'RecordEncoder', 'ParallelEncoder', 'AsyncEncoder', 'CheckpointedEncoder',
+                  'PipelinedEncoder', 'encode_inplace'),
+    '_checkpoint': ('Checkpoint',),
+    '_codes': ('Cesar', 'Xor', 'ScalarEncryptionKey', 'IterableEncryptionKey'),
+    '_readers_writers': ('FileWriter', 'FileReader', 'ConsoleWriter', 'ConsoleReader',
+                         'StringWriter', 'StringReader', 'MmapFileReader', 'MmapFileWriter',
+                         'StdinReader', 'StdoutWriter', 'AsyncStreamReader', 'AsyncStreamWriter',
+                         'CompressedFileReader', 'CompressedFileWriter', 'NoSync',
+                         'SyncOnFinish', 'SyncEveryBytes', 'SyncEverySeconds'),
+    '_metrics': ('MetricsSink', 'LoggingSink', 'JsonLinesSink', 'InMemorySink',
+                 'set_metrics_sinks'),
+    '_registry': ('register_codec', 'get_codec', 'get_codec_names', 'get_coder'),
+}
+_MODULES = {name: module for module, names in _EXPORTS.items() for name in names}
+
+__all__ = sorted(_MODULES)
+
+
+def __getattr__(name):
+    if name not in _MODULES:
+        raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+    value = getattr(import_module('.' + _MODULES[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
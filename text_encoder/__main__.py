@@ -2,37 +2,100 @@
 # pylint: disable=too-few-public-methods
 
 from argparse import ArgumentParser
+import codecs
+from functools import partial
+from glob import glob
 import logging
+import os
+import sys
 
-from text_encoder._codes import Cesar, Xor, ScalarEncryptionKey, IterableEncryptionKey
+from text_encoder._compression import (COMPRESSIONS, detect_compression,
+                                       get_compression_by_extension)
 from text_encoder._readers_writers import (StringReader, FileWriter, FileReader,
-                                           ConsoleReader, ConsoleWriter)
-from text_encoder._encoders import Encoder, HeadedEncoder, NullCoder
+                                           ConsoleReader, ConsoleWriter, MmapFileReader,
+                                           MmapFileWriter, StdinReader, StdoutWriter,
+                                           CompressedFileReader, CompressedFileWriter,
+                                           DEFAULT_BLOCK_SIZE, DEFAULT_BUFFER_SIZE)
+from text_encoder._encoders import (Encoder, DelimitedHeadedEncoder, RecordEncoder,
+                                   ParallelEncoder, CheckpointedEncoder, PipelinedEncoder,
+                                   DEFAULT_CHECKPOINT_SIZE)
 from text_encoder._encoding_process import EncodingDoneObservable
-
-logging.basicConfig(format='%(levelname)s:%(message)s', level=logging.INFO)
+from text_encoder._metrics import LoggingSink, JsonLinesSink, set_metrics_sinks
+from text_encoder._registry import get_codec, get_coder, get_key
 
 
 class CmdArgumentsParser:
 
     """Parse input arguments."""
 
-    def __init__(self, parser):
+    def __init__(self, parser, args=None):
         self.parser = parser
         self.parser.add_argument('--in_string', type=type(''), default=None, help='Input string')
         self.parser.add_argument('--in_file', type=type(''), default=None, help='Input file path')
         self.parser.add_argument('--in_console', action='store_true', help='Console input')
+        self.parser.add_argument('--in_stdin', action='store_true',
+                                 help='Binary standard input streamed in blocks')
         self.parser.add_argument('--out_file', type=type(''), default=None, help='Output file path')
         self.parser.add_argument('--out_console', action='store_true', help='Console output')
+        self.parser.add_argument('--out_stdout', action='store_true',
+                                 help='Binary standard output streamed in blocks')
         self.parser.add_argument('--cesar', action='store_true', help='Select the Cesar code')
         self.parser.add_argument('--xor', action='store_true', help='Select the Xor code')
+        self.parser.add_argument('--codec', type=str, default=None,
+                                 help='Select code registered under name')
         self.parser.add_argument('--key', type=int, default=0, help='Key to selected code')
         self.parser.add_argument('--keys_int', type=str, default=0,
                                  help='Vector of coma-separated int keys to selected code')
         self.parser.add_argument('--key_text', type=str, default=0,
                                  help='String of keys to selected code')
         self.parser.add_argument('--headed', action='store_true', help='Message has header')
-        self._arguments = self.parser.parse_args()
+        self.parser.add_argument('--mmap', action='store_true',
+                                 help='Encode memory mapped input file into output file')
+        self.parser.add_argument('--workers', type=int, default=None,
+                                 help='Encode input file into output file on N processes')
+        self.parser.add_argument('--record_delimiter', type=str, default=None,
+                                 help='Encode bodies of records ending with delimiter, '
+                                      'leaving header lines of records not encoded')
+        self.parser.add_argument('--reset_key', action='store_true',
+                                 help='Start key from the beginning in every record body')
+        self.parser.add_argument('--metrics_file', type=str, default=None,
+                                 help='Append encoding metrics to file as JSON lines')
+        self.parser.add_argument('--profile', type=str, default=None,
+                                 help='Run encoding under cProfile, dump pstats to file and '
+                                      'print hottest functions to standard error')
+        self.parser.add_argument('--tracemalloc', type=str, default=None,
+                                 help='Trace allocations of encoding, dump snapshot to file and '
+                                      'print top allocating lines to standard error')
+        self.parser.add_argument('--profile_top', type=int, default=20,
+                                 help='Number of functions or lines printed by profiling')
+        self.parser.add_argument('--block_size', type=int, default=None,
+                                 help='Encode in blocks of N chars')
+        self.parser.add_argument('--in_files', type=str, nargs='+', default=None,
+                                 help='Input file paths encoded in batch')
+        self.parser.add_argument('--in_glob', type=str, default=None,
+                                 help='Glob of input files encoded in batch')
+        self.parser.add_argument('--in_manifest', type=str, default=None,
+                                 help='File listing input file paths encoded in batch')
+        self.parser.add_argument('--out_dir', type=str, default=None,
+                                 help='Output directory for batch encoding')
+        self.parser.add_argument('--checkpoint', action='store_true',
+                                 help='Save checkpoints of encoding input file into output file '
+                                      'to OUT_FILE.checkpoint')
+        self.parser.add_argument('--checkpoint_size', type=int, default=DEFAULT_CHECKPOINT_SIZE,
+                                 help='Save checkpoint after every N bytes of output')
+        self.parser.add_argument('--resume', action='store_true',
+                                 help='Continue checkpointed encoding from its last checkpoint')
+        self.parser.add_argument('--in_compression', type=str, default='auto',
+                                 choices=('auto', 'none') + COMPRESSIONS,
+                                 help='Decompress input file, by default compression is detected '
+                                      'from its magic bytes or extension')
+        self.parser.add_argument('--out_compression', type=str, default=None, choices=COMPRESSIONS,
+                                 help='Compress output file, by default compression is detected '
+                                      'from its extension')
+        self.parser.add_argument('--pipeline_depth', type=int, default=None,
+                                 help='Read, encode and write blocks on separate threads, '
+                                      'with up to N blocks queued between them')
+        self._arguments = self.parser.parse_args(args)
 
     @property
     def arguments(self):
@@ -54,65 +117,211 @@ class CmdEncoderFactory:
 
     def get_encoder(self):
         """Get appropriate encoder."""
+        if self._arguments.pipeline_depth is not None and self._arguments.pipeline_depth < 1:
+            raise RuntimeError('Pipeline depth shall be at least 1.')
+        if self._arguments.pipeline_depth and (self._arguments.headed or
+                                               self._arguments.record_delimiter):
+            raise RuntimeError('Pipelined mode cannot encode headed input or records.')
+        if self._arguments.in_files or self._arguments.in_glob or self._arguments.in_manifest:
+            return self._get_batch_encoder()
+        if self._arguments.pipeline_depth and (self._arguments.workers or self._arguments.checkpoint
+                                               or self._arguments.resume):
+            raise RuntimeError('Pipelined mode cannot be combined with parallel or '
+                               'checkpointed mode.')
+        if self._arguments.workers and (self._arguments.mmap or self._arguments.record_delimiter):
+            raise RuntimeError('Parallel mode cannot be combined with memory mapped or record '
+                               'mode.')
+        if (self._arguments.checkpoint or self._arguments.resume) and (
+                self._arguments.workers or self._arguments.mmap or
+                self._arguments.record_delimiter):
+            raise RuntimeError('Checkpointed mode cannot be combined with parallel, memory mapped '
+                               'or record mode.')
+        if (self._arguments.mmap or self._arguments.workers or self._arguments.checkpoint
+                or self._arguments.resume) and self._has_compressed_file():
+            raise RuntimeError('Compressed files can only be encoded as streams.')
+        if self._arguments.mmap and not (self._arguments.in_file and self._arguments.out_file):
+            raise RuntimeError('Memory mapped mode needs input and output file.')
+        if self._arguments.workers:
+            return self._get_parallel_encoder()
+        if self._arguments.checkpoint or self._arguments.resume:
+            return self._get_checkpointed_encoder()
         reader = self._get_reader()
         writer = self._get_writer(self._encoding_done_subject)
         coder = self._get_coder()
+        block_size = self._get_block_size()
 
+        if self._arguments.record_delimiter:
+            record_delimiter = codecs.decode(self._arguments.record_delimiter, 'unicode_escape')
+            return RecordEncoder(reader, writer, coder, record_delimiter, '\n',
+                                 self._arguments.reset_key, block_size or DEFAULT_BLOCK_SIZE)
         if self._arguments.headed:
+            return DelimitedHeadedEncoder(reader, writer, coder, '\n',
+                                          block_size or DEFAULT_BLOCK_SIZE)
+
+        if self._arguments.pipeline_depth:
+            return PipelinedEncoder(reader, writer, coder, block_size or DEFAULT_BUFFER_SIZE,
+                                    self._arguments.pipeline_depth)
+        return Encoder(reader, writer, coder, block_size)
+
+    def _get_block_size(self):
+        if self._arguments.block_size:
+            return self._arguments.block_size
+        if self._arguments.mmap or self._arguments.in_stdin or self._arguments.out_stdout:
+            return DEFAULT_BUFFER_SIZE
+        if self._arguments.in_file and self._arguments.out_file:
+            return DEFAULT_BUFFER_SIZE
+        return None
+
+    def _is_binary(self):
+        return bool(self._arguments.in_file or self._arguments.in_stdin)
+
+    def _has_compressed_file(self):
+        return bool(self._get_in_compression() or self._get_out_compression())
+
+    def _get_in_compression(self):
+        if not self._arguments.in_file or self._arguments.in_compression == 'none':
+            return None
+        if self._arguments.in_compression != 'auto':
+            return self._arguments.in_compression
+        if os.path.isfile(self._arguments.in_file):
+            return detect_compression(self._arguments.in_file)
+        return None
+
+    def _get_out_compression(self):
+        if self._arguments.out_file:
+            return (self._arguments.out_compression or
+                    get_compression_by_extension(self._arguments.out_file))
+        return None
 
-            is_end_of_header = lambda x: x == '\n'
+    def _get_parallel_encoder(self):
+        if not (self._arguments.in_file and self._arguments.out_file):
+            raise RuntimeError('Parallel mode needs input and output file.')
+        header_delimiter = b'\n' if self._arguments.headed else None
+        return ParallelEncoder(self._arguments.in_file, self._arguments.out_file,
+                               self._get_coder_type(), self._get_key(),
+                               self._arguments.workers, header_delimiter)
 
-            header_encoder = NullCoder(reader, writer)
-            body_encoder = Encoder(reader, writer, coder)
-            return HeadedEncoder(header_encoder, body_encoder, is_end_of_header)
+    def _get_checkpointed_encoder(self):
+        if not (self._arguments.in_file and self._arguments.out_file):
+            raise RuntimeError('Checkpointed mode needs input and output file.')
+        header_delimiter = b'\n' if self._arguments.headed else None
+        return CheckpointedEncoder(self._arguments.in_file, self._arguments.out_file,
+                                   self._get_coder_type(), self._get_key(), header_delimiter,
+                                   self._arguments.resume, self._arguments.checkpoint_size,
+                                   self._get_block_size())
 
-        return Encoder(reader, writer, coder)
+    def _get_batch_encoder(self):
+        from text_encoder._batch import BatchEncoder  # pylint: disable=import-outside-toplevel
+        if not self._arguments.out_dir:
+            raise RuntimeError('Batch mode needs output directory.')
+        return BatchEncoder(self._arguments, self._get_batch_paths(), self._arguments.out_dir,
+                            self._arguments.workers)
+
+    def _get_batch_paths(self):
+        paths = list(self._arguments.in_files or [])
+        if self._arguments.in_glob:
+            paths.extend(sorted(glob(self._arguments.in_glob, recursive=True)))
+        if self._arguments.in_manifest:
+            with open(self._arguments.in_manifest) as manifest:
+                paths.extend(line.strip() for line in manifest if line.strip())
+        return paths
 
     def _get_reader(self):
         if self._arguments.in_string:
             return StringReader(self._arguments.in_string)
+        if self._arguments.in_file and self._arguments.mmap:
+            return MmapFileReader(self._arguments.in_file)
+        if self._arguments.in_file and self._get_in_compression():
+            return CompressedFileReader(self._arguments.in_file, self._get_in_compression(),
+                                        binary=True)
         if self._arguments.in_file:
-            return FileReader(self._arguments.in_file)
+            return FileReader(self._arguments.in_file, binary=True)
         if self._arguments.in_console:
             return ConsoleReader()
+        if self._arguments.in_stdin:
+            return StdinReader(binary=True)
         raise RuntimeError('No reader provided.')
 
     def _get_writer(self, observable):
+        if self._arguments.out_file and self._arguments.mmap:
+            mmap_writer = MmapFileWriter(self._arguments.out_file,
+                                         os.path.getsize(self._arguments.in_file))
+            observable.register_observer(mmap_writer)
+            return mmap_writer
+        if self._arguments.out_file and self._get_out_compression():
+            file_writer = CompressedFileWriter(self._arguments.out_file,
+                                               self._get_out_compression())
+            observable.register_observer(file_writer)
+            return file_writer
         if self._arguments.out_file:
-            file_writer = FileWriter(self._arguments.out_file)
+            file_writer = FileWriter(self._arguments.out_file, binary=self._is_binary())
             observable.register_observer(file_writer)
             return file_writer
         if self._arguments.out_console:
             return ConsoleWriter()
+        if self._arguments.out_stdout:
+            stdout_writer = StdoutWriter()
+            observable.register_observer(stdout_writer)
+            return stdout_writer
         raise RuntimeError('No writer provided.')
 
     def _get_coder(self):
+        return get_coder(self._get_codec_name(), self._get_key_value())
+
+    def _get_coder_type(self):
+        return get_codec(self._get_codec_name())
+
+    def _get_codec_name(self):
+        if self._arguments.codec:
+            return self._arguments.codec
         if self._arguments.cesar:
-            return Cesar(self._get_key())
+            return 'cesar'
         if self._arguments.xor:
-            return Xor(self._get_key())
+            return 'xor'
         raise RuntimeError('No coder provided.')
 
     def _get_key(self):
+        return get_key(self._get_key_value())
+
+    def _get_key_value(self):
         if self._arguments.key:
-            return ScalarEncryptionKey(self._arguments.key)
+            return self._arguments.key
         if self._arguments.keys_int:
-            return IterableEncryptionKey([int(i) for i in self._arguments.keys_int.split(',')])
+            return [int(i) for i in self._arguments.keys_int.split(',')]
         if self._arguments.key_text:
-            return IterableEncryptionKey(self._arguments.key_text)
+            return self._arguments.key_text
         raise RuntimeError('No key nor key_vector provided.')
 
 
 def main():
 
     """Console for text Encoder."""
+    logging.basicConfig(format='%(levelname)s:%(message)s', level=logging.INFO)
+    if sys.argv[1:2] == ['serve']:
+        from text_encoder import _server  # pylint: disable=import-outside-toplevel
+        _server.main(sys.argv[2:])
+        return
+
     encoding_done_subject = EncodingDoneObservable()
 
     arg_parser = ArgumentParser()
     parser = CmdArgumentsParser(arg_parser)
-    CmdEncoderFactory(parser.arguments, encoding_done_subject).get_encoder().encode()
+    if parser.arguments.metrics_file:
+        set_metrics_sinks(LoggingSink(), JsonLinesSink(parser.arguments.metrics_file))
+    encode = CmdEncoderFactory(parser.arguments, encoding_done_subject).get_encoder().encode
+    if parser.arguments.tracemalloc or parser.arguments.profile:
+        from text_encoder import _profiling  # pylint: disable=import-outside-toplevel
+    if parser.arguments.tracemalloc:
+        encode = partial(_profiling.trace_allocations, encode, parser.arguments.tracemalloc,
+                         parser.arguments.profile_top)
+    if parser.arguments.profile:
+        encode = partial(_profiling.profile, encode, parser.arguments.profile,
+                         parser.arguments.profile_top)
+    failed = encode()
 
     encoding_done_subject.notify_observers()
+    if failed:
+        sys.exit(1)
 
 
 if __name__ == '__main__':
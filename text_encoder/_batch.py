@@ -0,0 +1,108 @@
+"""Batch encoding of many files."""
+# pylint: disable=too-few-public-methods
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from copy import copy
+import logging
+import os
+import time
+
+from text_encoder.__main__ import CmdEncoderFactory
+from text_encoder._encoders import BaseEncoder
+from text_encoder._encoding_process import EncodingDoneObservable
+from text_encoder._metrics import JsonLinesSink, set_metrics_sinks
+from text_encoder._readers_writers import DEFAULT_BUFFER_SIZE
+
+FILES_PER_TASK = 16
+
+
+class BatchEncoder(BaseEncoder):
+
+    """Encode many files concurrently on worker processes.
+
+    Every file gets its own reader, writer and key, built from command
+    line arguments like a single file encoding would. Output files keep
+    their paths relative to the common directory of inputs.
+    """
+
+    def __init__(self, arguments, in_paths, out_dir, workers=None):
+        self._arguments = arguments
+        self._in_paths = in_paths
+        self._out_dir = out_dir
+        self._workers = workers
+
+    def encode(self, stop_predicate=None):
+        """Encode all files and log throughput summary with failed files.
+
+        A file failing to encode does not stop encoding of other files.
+
+        :param stop_predicate: not supported, shall be None
+        :type stop_predicate: function
+        :return: number of files which failed to encode
+        :rtype: int
+        """
+        if stop_predicate is not None:
+            raise ValueError('Stop predicate is not supported in batch encoding.')
+        start_time = time.perf_counter()
+        paths = list(zip(self._in_paths, self._get_out_paths()))
+        results = []
+        with ProcessPoolExecutor(self._workers) as executor:
+            tasks = {executor.submit(_encode_files, self._arguments,
+                                     paths[start:start + FILES_PER_TASK]):
+                     paths[start:start + FILES_PER_TASK]
+                     for start in range(0, len(paths), FILES_PER_TASK)}
+            for task in as_completed(tasks):
+                try:
+                    results.extend(task.result())
+                except Exception as error:  # pylint: disable=broad-except
+                    results.extend((in_path, 0, str(error)) for in_path, _ in tasks[task])
+        self._log_summary(results, time.perf_counter() - start_time)
+        return sum(1 for _, _, error in results if error is not None)
+
+    @staticmethod
+    def _log_summary(results, seconds):
+        size = sum(file_size for _, file_size, _ in results)
+        errors = [(in_path, error) for in_path, _, error in results if error is not None]
+        logging.info('Batch of {} files, {} bytes complete in {:.2f} seconds, {:.2f} MB/s, '
+                     '{} failed.'.format(len(results), size, seconds, size / seconds / 1e6,
+                                         len(errors)))
+        for in_path, error in sorted(errors):
+            logging.error('Encoding {} failed: {}'.format(in_path, error))
+
+    def _get_out_paths(self):
+        if not self._in_paths:
+            return []
+        base_dir = os.path.commonpath([os.path.dirname(os.path.abspath(path))
+                                       for path in self._in_paths])
+        out_paths = [os.path.join(self._out_dir, os.path.relpath(os.path.abspath(path), base_dir))
+                     for path in self._in_paths]
+        for out_path in out_paths:
+            os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        return out_paths
+
+
+def _encode_files(arguments, paths):
+    set_metrics_sinks(*([JsonLinesSink(arguments.metrics_file)] if arguments.metrics_file else []))
+    results = []
+    for in_path, out_path in paths:
+        try:
+            results.append((in_path, _encode_file(arguments, in_path, out_path), None))
+        except Exception as error:  # pylint: disable=broad-except
+            results.append((in_path, 0, '{}: {}'.format(type(error).__name__, error)))
+    return results
+
+
+def _encode_file(arguments, in_path, out_path):
+    arguments = copy(arguments)
+    arguments.in_files = arguments.in_glob = arguments.in_manifest = None
+    arguments.in_string = arguments.workers = None
+    arguments.in_file = in_path
+    arguments.out_file = out_path
+    arguments.block_size = arguments.block_size or DEFAULT_BUFFER_SIZE
+    encoding_done_subject = EncodingDoneObservable()
+    encoder = CmdEncoderFactory(arguments, encoding_done_subject).get_encoder()
+    try:
+        encoder.encode()
+    finally:
+        encoding_done_subject.notify_observers()
+    return os.path.getsize(in_path)
@@ -0,0 +1,79 @@
+"""Checkpoints of encoding, kept in sidecar file of output."""
+# pylint: disable=too-few-public-methods
+
+import json
+import os
+
+CHECKPOINT_SUFFIX = '.checkpoint'
+
+
+class Checkpoint:
+
+    """Position of encoding that can be continued after interruption.
+
+    Offsets count bytes already read from input and written to output,
+    key phase is the key stream position after them, and header_passed
+    tells if end of header was already found. Input size, codec, key
+    digest and header delimiter identify the encoding to be continued.
+    """
+
+    def __init__(self, in_offset=0, out_offset=0, key_phase=0, header_passed=False,
+                 in_size=None, codec=None, key_digest=None, header_delimiter=None):
+        self.in_offset = in_offset
+        self.out_offset = out_offset
+        self.key_phase = key_phase
+        self.header_passed = header_passed
+        self.in_size = in_size
+        self.codec = codec
+        self.key_digest = key_digest
+        self.header_delimiter = header_delimiter
+
+    def as_dict(self):
+        """Get checkpoint fields.
+
+        :return: checkpoint fields
+        :rtype: dict
+        """
+        return {'in_offset': self.in_offset, 'out_offset': self.out_offset,
+                'key_phase': self.key_phase, 'header_passed': self.header_passed,
+                'in_size': self.in_size, 'codec': self.codec, 'key_digest': self.key_digest,
+                'header_delimiter': self.header_delimiter}
+
+    def save(self, path):
+        """Replace checkpoint file atomically, so it is never left half written.
+
+        :param path: checkpoint file path
+        :type path: str
+        """
+        temporary_path = path + '.tmp'
+        with open(temporary_path, 'w') as file:
+            json.dump(self.as_dict(), file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Read checkpoint file.
+
+        :param path: checkpoint file path
+        :type path: str
+        :return: checkpoint, None if there is no checkpoint file
+        :rtype: Checkpoint
+        """
+        try:
+            with open(path) as file:
+                return cls(**json.load(file))
+        except FileNotFoundError:
+            return None
+
+
+def get_checkpoint_path(out_path):
+    """Get path of checkpoint sidecar of output file.
+
+    :param out_path: output file path
+    :type out_path: str
+    :return: checkpoint file path
+    :rtype: str
+    """
+    return out_path + CHECKPOINT_SUFFIX
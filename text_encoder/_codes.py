@@ -2,38 +2,252 @@
 # pylint: disable=too-few-public-methods
 
 from abc import abstractmethod, ABC
+from functools import lru_cache
 
 from text_encoder._printables import (min_ascii_code, max_ascii_code, ascii_printables_codes,
                                       ascii_codes_table_size, ASCII_PRINTABLES_CHARS)
 
 
+@lru_cache(maxsize=1)
+def _get_numpy():
+    """Import NumPy on first use of vectorized encoding.
+
+    :return: numpy module, or None if it is not installed
+    :rtype: module
+    """
+    try:
+        import numpy  # pylint: disable=import-outside-toplevel
+    except ImportError:  # pragma no cover
+        return None
+    return numpy
+
+_TRANSLATION_TABLE_SIZE = 256
+_NUMPY_MIN_SIZE = 64
+_PRINTABLE_BYTES = bytes(ascii_printables_codes)
+_PRINTABLE_INDEXES = [ascii_printables_codes.index(code) if code in ascii_printables_codes else -1
+                      for code in range(_TRANSLATION_TABLE_SIZE)]
+
+
+@lru_cache(maxsize=1)
+def _get_printable_arrays():
+    numpy = _get_numpy()
+    return (numpy.array(_PRINTABLE_INDEXES, dtype=numpy.int16),
+            numpy.array(ascii_printables_codes, dtype=numpy.uint8))
+
+
 def _get_in_int_format(key):
     if isinstance(key, int):
         return key
     return ord(key)
 
 
+def _copy(instance):
+    # Shallow copy without copy module protocol, clones are made per request.
+    clone = object.__new__(type(instance))
+    clone.__dict__.update(instance.__dict__)
+    return clone
+
+
+def _translate_text(text, text_table, bytes_table):
+    if text.isascii() or bytes_table is None:
+        return text.translate(text_table)
+    try:
+        data = text.encode('latin-1')
+    except UnicodeEncodeError:
+        return text.translate(text_table)
+    return data.translate(bytes_table).decode('latin-1')
+
+
 class Coder(ABC):
 
     """Coder interface."""
 
+    uses_key_per_char = True
+    key_period = None
+
     @abstractmethod
     def encode_char(self, char):
         """This method shall be implemented."""
 
+    @staticmethod
+    def count_key_uses(chunk):
+        """Count keys taken from key to encode chunk.
+
+        :param chunk: chars to encode
+        :type chunk: str or bytes
+        :return: number of keys
+        :rtype: int
+        """
+        return len(chunk)
+
+    def encode_block(self, chunk):
+        """Encode chunk of chars.
+
+        Falls back to encoding the chunk char by char. Bytes are
+        treated as latin-1 text.
+
+        :param chunk: chars to encode
+        :type chunk: str or bytes
+        :return: encoded chars
+        :rtype: str or bytes
+        """
+        if isinstance(chunk, str):
+            return ''.join([self.encode_char(char) for char in chunk])
+        return self.encode_block(bytes(chunk).decode('latin-1')).encode('latin-1')
+
+    def encode_block_into(self, chunk, output):
+        """Encode chunk of bytes into preallocated output buffer.
+
+        Falls back to copying result of ``encode_block`` into output.
+
+        :param chunk: bytes to encode
+        :type chunk: bytes-like
+        :param output: buffer at least as long as chunk
+        :type output: bytearray or memoryview
+        :return: number of bytes written to output
+        :rtype: int
+        """
+        encoded = self.encode_block(chunk)
+        output[:len(encoded)] = encoded
+        return len(encoded)
+
+    def reset(self):
+        """Move key stream back to its start.
+
+        Coders without key state have nothing to reset.
+        """
+
+    def clone(self):
+        """Get coder sharing prepared tables, with its own key stream at start.
+
+        :return: coder
+        :rtype: Coder
+        """
+        coder = _copy(self)
+        for name, value in vars(self).items():
+            if isinstance(value, EncryptionKey):
+                setattr(coder, name, value.clone())
+        return coder
+
 
 class Cesar(Coder):
 
     """Encode letter with Cesar code."""
 
+    uses_key_per_char = False
+
     def __init__(self, key):
         self._cesar_key = key
+        self.key_period = len(key) if isinstance(key, IterableEncryptionKey) else 1
+        self._text_table = None
+        self._bytes_table = None
+        if isinstance(key, ScalarEncryptionKey):
+            self._text_table = self._get_translation_table()
+            self._bytes_table = self._text_table.encode('latin-1')
+
+    def reset(self):
+        """Move key stream back to its start."""
+        self._cesar_key.reset()
 
     def encode_char(self, _char):
+        if not isinstance(_char, str):
+            return self.encode_char(bytes(_char).decode('latin-1')).encode('latin-1')
+        if self._text_table is not None:
+            return self._translate(_char)
         if _char in ASCII_PRINTABLES_CHARS:
             return chr(self._get_new_ascii_code(_char))
         return _char
 
+    def encode_block(self, chunk):
+        """Encode whole chunk of text.
+
+        With scalar key the chunk is translated at once. With iterable key
+        printables are shifted through printable table indexes, using NumPy
+        when installed. Keys are used by printables only, like in encode_char.
+
+        :param chunk: text to encode
+        :type chunk: str or bytes
+        :return: encoded text
+        :rtype: str or bytes
+        """
+        if self._text_table is not None:
+            return self._translate(chunk)
+        if isinstance(self._cesar_key, IterableEncryptionKey):
+            return self._encode_block_with_key_stream(chunk)
+        return super().encode_block(chunk)
+
+    def encode_block_into(self, chunk, output):
+        """Encode chunk of bytes into output.
+
+        With scalar key the chunk is translated, with iterable key it is
+        shifted in place with NumPy when installed.
+
+        :param chunk: bytes to encode
+        :type chunk: bytes-like
+        :param output: buffer at least as long as chunk
+        :type output: bytearray or memoryview
+        :return: number of bytes written to output
+        :rtype: int
+        """
+        if self._bytes_table is not None:
+            output[:len(chunk)] = bytes(chunk).translate(self._bytes_table)
+            return len(chunk)
+        numpy = _get_numpy() if isinstance(self._cesar_key, IterableEncryptionKey) else None
+        if numpy is None:
+            return super().encode_block_into(chunk, output)
+        codes = numpy.frombuffer(chunk, dtype=numpy.uint8)
+        result = numpy.frombuffer(output, dtype=numpy.uint8)[:len(codes)]
+        result[:] = codes
+        _shift_printables_in_place(result, self._get_shifts(self.count_key_uses(chunk)))
+        return len(codes)
+
+    @staticmethod
+    def count_key_uses(chunk):
+        """Count printables in chunk, only they take keys."""
+        if isinstance(chunk, str):
+            return sum(1 for char in chunk if char in ASCII_PRINTABLES_CHARS)
+        return len(chunk) - len(bytes(chunk).translate(None, _PRINTABLE_BYTES))
+
+    def _encode_block_with_key_stream(self, chunk):
+        if not isinstance(chunk, str):
+            return self._shift_printables(bytes(chunk))
+        try:
+            data = chunk.encode('latin-1')
+        except UnicodeEncodeError:
+            return super().encode_block(chunk)
+        return self._shift_printables(data).decode('latin-1')
+
+    def _shift_printables(self, data):
+        # NumPy call overhead outweighs its speed on short chunks, like record bodies.
+        use_numpy = len(data) >= _NUMPY_MIN_SIZE and _get_numpy() is not None
+        shifts = self._get_shifts(self.count_key_uses(data), use_numpy)
+        if use_numpy:
+            return _shift_printables_with_numpy(data, shifts)
+        return _shift_printables(data, shifts)
+
+    def _get_shifts(self, count, use_numpy=True):
+        numpy = _get_numpy() if use_numpy else None
+        use_numpy = numpy is not None
+        try:
+            keys = self._cesar_key.get_many_bytes(count)
+        except ValueError:
+            shifts = [key % ascii_codes_table_size for key in self._cesar_key.get_many(count)]
+            return numpy.array(shifts, dtype=numpy.int16) if use_numpy else shifts
+        if use_numpy:
+            return numpy.frombuffer(keys, dtype=numpy.uint8).astype(numpy.int16)
+        return keys
+
+    def _translate(self, chunk):
+        if isinstance(chunk, str):
+            return _translate_text(chunk, self._text_table, self._bytes_table)
+        return bytes(chunk).translate(self._bytes_table)
+
+    def _get_translation_table(self):
+        table = [chr(code) for code in range(_TRANSLATION_TABLE_SIZE)]
+        for code in ascii_printables_codes:
+            table[code] = chr(self._get_new_ascii_code(chr(code)))
+        return ''.join(table)
+
     def _get_new_ascii_code(self, _char):
         current_code = ord(_char)
         cesar_key = self._normalize_key(self._cesar_key.get())
@@ -51,28 +265,218 @@ class Cesar(Coder):
         return key
 
 
+def _shift_printables(data, shifts):
+    result = bytearray(data)
+    shifts = iter(shifts)
+    for position, code in enumerate(data):
+        index = _PRINTABLE_INDEXES[code]
+        if index >= 0:
+            new_index = (index + next(shifts)) % ascii_codes_table_size
+            result[position] = ascii_printables_codes[new_index]
+    return bytes(result)
+
+
+def _shift_printables_with_numpy(data, shifts):
+    numpy = _get_numpy()
+    codes = numpy.frombuffer(data, dtype=numpy.uint8).copy()
+    _shift_printables_in_place(codes, shifts)
+    return codes.tobytes()
+
+
+def _shift_printables_in_place(codes, shifts):
+    printable_indexes, printable_codes = _get_printable_arrays()
+    indexes = printable_indexes[codes]
+    is_printable = indexes >= 0
+    new_indexes = (indexes[is_printable] + shifts) % ascii_codes_table_size
+    codes[is_printable] = printable_codes[new_indexes]
+
+
 class Xor(Coder):
 
     """Encode letter with Xor code."""
 
     def __init__(self, key):
         self._xor_key = key
+        self.key_period = len(key) if isinstance(key, IterableEncryptionKey) else 1
+        self._text_table = None
+        self._bytes_table = None
+        if isinstance(key, ScalarEncryptionKey):
+            self._text_table = _XorTranslationTable(key.get())
+            if 0 <= key.get() < _TRANSLATION_TABLE_SIZE:
+                self._bytes_table = bytes(code ^ key.get()
+                                          for code in range(_TRANSLATION_TABLE_SIZE))
+
+    def reset(self):
+        """Move key stream back to its start."""
+        self._xor_key.reset()
 
     def encode_char(self, _char):
+        if not isinstance(_char, str):
+            return self.encode_char(bytes(_char).decode('latin-1')).encode('latin-1')
         return self._change_char_by_xor_key(_char)
 
+    def encode_block_into(self, chunk, output):
+        """Encode chunk of bytes into output.
+
+        With scalar key the chunk is translated, with iterable key it is
+        xored in place with NumPy when installed.
+
+        :param chunk: bytes to encode
+        :type chunk: bytes-like
+        :param output: buffer at least as long as chunk
+        :type output: bytearray or memoryview
+        :return: number of bytes written to output
+        :rtype: int
+        """
+        if self._bytes_table is not None:
+            output[:len(chunk)] = bytes(chunk).translate(self._bytes_table)
+            return len(chunk)
+        numpy = _get_numpy() if isinstance(self._xor_key, IterableEncryptionKey) else None
+        if numpy is None:
+            return super().encode_block_into(chunk, output)
+        codes = numpy.frombuffer(chunk, dtype=numpy.uint8)
+        result = numpy.frombuffer(output, dtype=numpy.uint8)[:len(codes)]
+        try:
+            keys = self._xor_key.get_many_bytes(len(codes))
+        except ValueError:
+            return super().encode_block_into(chunk, output)
+        numpy.bitwise_xor(codes, numpy.frombuffer(keys, dtype=numpy.uint8), out=result)
+        return len(codes)
+
+    def encode_block(self, chunk):
+        """Encode whole chunk of text.
+
+        With scalar key the chunk is translated at once. With iterable key
+        it is xored with the repeated key, using NumPy when installed.
+
+        :param chunk: text to encode
+        :type chunk: str or bytes
+        :return: encoded text
+        :rtype: str or bytes
+        """
+        if isinstance(chunk, str) and self._text_table is not None:
+            return _translate_text(chunk, self._text_table, self._bytes_table)
+        if not isinstance(chunk, str) and self._bytes_table is not None:
+            return bytes(chunk).translate(self._bytes_table)
+        if isinstance(self._xor_key, IterableEncryptionKey):
+            return self._encode_block_with_key_stream(chunk)
+        return super().encode_block(chunk)
+
+    def _encode_block_with_key_stream(self, chunk):
+        if not isinstance(chunk, str):
+            return _xor_bytes(bytes(chunk), self._xor_key.get_many_bytes(len(chunk)))
+        try:
+            data = chunk.encode('latin-1')
+            keys = self._xor_key.get_many_bytes(len(chunk))
+        except ValueError:
+            keys = self._xor_key.get_many(len(chunk))
+            return ''.join(map(chr, map(int.__xor__, map(ord, chunk), keys)))
+        return _xor_bytes(data, keys).decode('latin-1')
+
     def _change_char_by_xor_key(self, _char):
         return chr(ord(_char) ^ self._xor_key.get())
 
 
+def _xor_bytes(data, keys):
+    numpy = _get_numpy()
+    if numpy is not None:
+        return numpy.bitwise_xor(numpy.frombuffer(data, dtype=numpy.uint8),
+                                 numpy.frombuffer(keys, dtype=numpy.uint8)).tobytes()
+    return (int.from_bytes(data, 'little') ^ int.from_bytes(keys, 'little')).to_bytes(
+        len(data), 'little')
+
+
+class _XorTranslationTable(dict):
+
+    """Lazily filled ``str.translate`` table xoring codes with key."""
+
+    def __init__(self, key):
+        super().__init__((code, code ^ key) for code in range(_TRANSLATION_TABLE_SIZE))
+        self._key = key
+
+    def __missing__(self, code):
+        self[code] = code ^ self._key
+        return self[code]
+
+
 class EncryptionKey(ABC):
 
-    """Encryption Key Interface."""
+    """Encryption Key Interface.
+
+    Keys form a stream read with ``get``. Position in the stream is
+    read with ``tell`` and moved with ``seek`` or ``reset``, while
+    ``key_at`` and ``slice`` address keys without moving it.
+    """
 
     @abstractmethod
     def get(self):
         """This method shall be implemented."""
 
+    @abstractmethod
+    def key_at(self, offset):
+        """This method shall be implemented."""
+
+    @abstractmethod
+    def tell(self):
+        """This method shall be implemented."""
+
+    @abstractmethod
+    def seek(self, offset):
+        """This method shall be implemented."""
+
+    def reset(self):
+        """Move key stream back to its start."""
+        self.seek(0)
+
+    def clone(self):
+        """Get key sharing prepared state, with its own stream at start.
+
+        :return: key
+        :rtype: EncryptionKey
+        """
+        key = _copy(self)
+        key.reset()
+        return key
+
+    def slice(self, offset, length):
+        """Get length keys starting at offset, without moving key stream.
+
+        :param offset: position of first key
+        :type offset: int
+        :param length: number of keys
+        :type length: int
+        :return: keys
+        :rtype: list
+        """
+        return [self.key_at(offset + index) for index in range(length)]
+
+    def get_many(self, count):
+        """Get next count keys in int format.
+
+        :param count: number of keys
+        :type count: int
+        :return: keys
+        :rtype: list
+        """
+        start = self.tell()
+        keys = self.slice(start, count)
+        self.seek(start + count)
+        return keys
+
+    def get_many_bytes(self, count):
+        """Get next count keys as bytes.
+
+        :param count: number of keys
+        :type count: int
+        :return: keys
+        :rtype: bytes
+        :raises ValueError: if key does not fit in byte
+        """
+        start = self.tell()
+        keys = bytes(self.slice(start, count))
+        self.seek(start + count)
+        return keys
+
 
 class ScalarEncryptionKey(EncryptionKey):
 
@@ -85,6 +489,25 @@ class ScalarEncryptionKey(EncryptionKey):
         """Get encryption key in int format."""
         return _get_in_int_format(self._initial_key)
 
+    def key_at(self, offset):
+        """Get key, it is the same at every offset."""
+        return self.get()
+
+    def tell(self):
+        """Scalar key stream has a single position."""
+        return 0
+
+    def seek(self, offset):
+        """Scalar key stream has a single position."""
+
+    def slice(self, offset, length):
+        """Get length copies of key in int format."""
+        return [self.get()] * length
+
+    def get_many_bytes(self, count):
+        """Get count copies of key as bytes."""
+        return bytes([self.get()]) * count
+
 
 class IterableEncryptionKey(EncryptionKey):
 
@@ -92,16 +515,49 @@ class IterableEncryptionKey(EncryptionKey):
 
     def __init__(self, key):
         self._initial_key = key
-        self._key_iterator = self._get_next_key()
+        self._keys = [_get_in_int_format(k) for k in key]
+        self._key_bytes = None
+        if all(0 <= k < _TRANSLATION_TABLE_SIZE for k in self._keys):
+            self._key_bytes = bytes(self._keys)
+        self._tiled_key_bytes = b''
+        self._position = 0
 
-    def _get_next_key(self):
-        for k in self._initial_key:
-            yield _get_in_int_format(k)
+    def __len__(self):
+        return len(self._keys)
 
     def get(self):
         """Get encryption key in int format."""
-        try:
-            return self._key_iterator.__next__()
-        except StopIteration:
-            self._key_iterator = self._get_next_key()
-            return self._key_iterator.__next__()
+        key = self._keys[self._position]
+        self._position = (self._position + 1) % len(self._keys)
+        return key
+
+    def key_at(self, offset):
+        """Get key at offset of looped key stream."""
+        return self._keys[offset % len(self._keys)]
+
+    def tell(self):
+        """Get position in key, from 0 to key length - 1."""
+        return self._position
+
+    def seek(self, offset):
+        """Move key stream to offset of looped key stream."""
+        self._position = offset % len(self._keys)
+
+    def slice(self, offset, length):
+        """Get length keys from offset of looped key stream."""
+        return self._tile(self._keys, offset % len(self._keys), length)
+
+    def get_many_bytes(self, count):
+        """Get next count keys as bytes, looping over the key."""
+        if self._key_bytes is None:
+            raise ValueError('Key does not fit in byte.')
+        start = self._position
+        self.seek(start + count)
+        if len(self._tiled_key_bytes) < start + count:
+            self._tiled_key_bytes = self._key_bytes * ((start + count) // len(self._keys) + 1)
+        return self._tiled_key_bytes[start:start + count]
+
+    @staticmethod
+    def _tile(keys, start, count):
+        rotated_keys = keys[start:] + keys[:start]
+        return (rotated_keys * (count // len(keys) + 1))[:count]
@@ -0,0 +1,245 @@
+"""Compressed files, decompressed and compressed on background threads."""
+# pylint: disable=too-few-public-methods
+
+import os
+from queue import Queue
+import re
+from threading import Thread, Event
+
+COMPRESSIONS = ('gzip', 'bz2', 'xz', 'zstd')
+DEFAULT_QUEUE_DEPTH = 4
+
+# bz2 header is followed by magic of first block, or of stream end when empty.
+_MAGIC_BYTES = ((re.compile(re.escape(b'\x1f\x8b')), 'gzip'),
+                (re.compile(rb'BZh[1-9](1AY&SY|\x17rE8P\x90)'), 'bz2'),
+                (re.compile(re.escape(b'\xfd7zXZ\x00')), 'xz'),
+                (re.compile(re.escape(b'\x28\xb5\x2f\xfd')), 'zstd'))
+_MAGIC_SIZE = 10
+_EXTENSIONS = {'.gz': 'gzip', '.bz2': 'bz2', '.xz': 'xz', '.lzma': 'xz', '.zst': 'zstd'}
+_END = object()
+
+
+def get_compression_by_extension(path):
+    """Get compression of file from its extension.
+
+    :param path: file path
+    :type path: str
+    :return: compression name, None for not compressed file
+    :rtype: str
+    """
+    return _EXTENSIONS.get(os.path.splitext(path)[1].lower())
+
+
+def detect_compression(path):
+    """Get compression of existing file from its magic bytes or extension.
+
+    :param path: file path
+    :type path: str
+    :return: compression name, None for not compressed file
+    :rtype: str
+    """
+    with open(path, 'rb') as file:
+        head = file.read(_MAGIC_SIZE)
+    for magic, compression in _MAGIC_BYTES:
+        if magic.match(head):
+            return compression
+    return get_compression_by_extension(path)
+
+
+def open_compressed(path, mode, compression):
+    """Open compressed file as binary file of its decompressed content.
+
+    File can be given as path or as binary file object, which is left
+    open when compressed file is closed.
+
+    :param path: file path or binary file object
+    :type path: str or file
+    :param mode: ``rb`` or ``wb``
+    :type mode: str
+    :param compression: one of COMPRESSIONS
+    :type compression: str
+    :return: binary file
+    :rtype: file
+    :raises RuntimeError: if zstd is used and zstandard is not installed
+    :raises ValueError: if compression is unknown
+    """
+    # pylint: disable=import-outside-toplevel
+    if compression == 'gzip':
+        import gzip
+        return gzip.open(path, mode, compresslevel=6)
+    if compression == 'bz2':
+        import bz2
+        return bz2.open(path, mode)
+    if compression == 'xz':
+        import lzma
+        return lzma.open(path, mode)
+    if compression == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise RuntimeError('zstd compression needs zstandard package.') from None
+        is_path = isinstance(path, str)
+        file = open(path, mode) if is_path else path
+        if mode == 'rb':
+            return zstandard.ZstdDecompressor().stream_reader(file, closefd=is_path)
+        return zstandard.ZstdCompressor().stream_writer(file, closefd=is_path)
+    raise ValueError('Unknown compression {!r}.'.format(compression))
+
+
+class ReadAheadFile:
+
+    """Read binary file on background thread, chunk_size bytes ahead.
+
+    Up to depth chunks are read ahead, so decompression of the next chunks
+    overlaps with processing of the current one.
+    """
+
+    def __init__(self, file, chunk_size, depth=DEFAULT_QUEUE_DEPTH):
+        self._file = file
+        self._chunks = Queue(depth)
+        self._stopped = Event()
+        self._chunk = memoryview(b'')
+        self._is_end = False
+        self._thread = Thread(target=self._read_ahead, args=(chunk_size,), daemon=True)
+        self._thread.start()
+
+    def _read_ahead(self, chunk_size):
+        try:
+            while not self._stopped.is_set():
+                chunk = self._file.read(chunk_size)
+                if not chunk:
+                    break
+                self._chunks.put(chunk)
+        except Exception as error:  # pylint: disable=broad-except
+            self._chunks.put(error)
+        finally:
+            self._chunks.put(_END)
+
+    def _next_chunk(self):
+        if self._is_end:
+            return False
+        chunk = self._chunks.get()
+        if chunk is _END:
+            self._is_end = True
+            return False
+        if isinstance(chunk, Exception):
+            self._chunks.get()
+            self._is_end = True
+            raise chunk
+        self._chunk = memoryview(chunk)
+        return True
+
+    def readinto(self, buffer):
+        """Read bytes into buffer.
+
+        :param buffer: writable buffer
+        :type buffer: bytearray or memoryview
+        :return: number of bytes read, 0 at end of file
+        :rtype: int
+        """
+        if not self._chunk and not self._next_chunk():
+            return 0
+        size = min(len(buffer), len(self._chunk))
+        buffer[:size] = self._chunk[:size]
+        self._chunk = self._chunk[size:]
+        return size
+
+    def read(self, size):
+        """Read up to size bytes.
+
+        :param size: maximal number of bytes
+        :type size: int
+        :return: bytes, empty at end of file
+        :rtype: bytes
+        """
+        buffer = bytearray(size)
+        return bytes(buffer[:self.readinto(buffer)])
+
+    def close(self):
+        """Stop reading ahead and close file."""
+        self._stopped.set()
+        while not self._is_end:
+            self._is_end = self._chunks.get() is _END
+        self._thread.join()
+        self._file.close()
+
+
+class WriteBehindFile:
+
+    """Write binary file on background thread.
+
+    Written data is copied and queued in chunks of at least chunk_size
+    bytes, up to depth chunks, so compression of earlier chunks overlaps
+    with producing the next ones.
+    """
+
+    def __init__(self, file, chunk_size, depth=DEFAULT_QUEUE_DEPTH):
+        self._file = file
+        self._chunk_size = chunk_size
+        self._pending = bytearray()
+        self._blocks = Queue(depth)
+        self._error = None
+        self._thread = Thread(target=self._write_behind, daemon=True)
+        self._thread.start()
+
+    def _write_behind(self):
+        while True:
+            block = self._blocks.get()
+            try:
+                if block is _END:
+                    return
+                if self._error is None:
+                    self._file.write(block)
+            except Exception as error:  # pylint: disable=broad-except
+                self._error = error
+            finally:
+                self._blocks.task_done()
+
+    def _raise_error(self):
+        if self._error is not None:
+            raise self._error
+
+    def write(self, data):
+        """Queue copy of data to be written.
+
+        :param data: bytes to write
+        :type data: bytes-like
+        :return: number of bytes queued
+        :rtype: int
+        """
+        self._raise_error()
+        if not self._pending and len(data) >= self._chunk_size:
+            self._blocks.put(bytes(data))
+            return len(data)
+        self._pending += data
+        if len(self._pending) >= self._chunk_size:
+            self._put_pending()
+        return len(data)
+
+    def _put_pending(self):
+        if self._pending:
+            self._blocks.put(bytes(self._pending))
+            self._pending.clear()
+
+    def flush(self):
+        """Wait until queued data is written and flush file."""
+        self._put_pending()
+        self._blocks.join()
+        self._raise_error()
+        self._file.flush()
+
+    def fileno(self):
+        """Get descriptor of underlying file.
+
+        :return: file descriptor
+        :rtype: int
+        """
+        return self._file.fileno()
+
+    def close(self):
+        """Write queued data and close file."""
+        self._put_pending()
+        self._blocks.put(_END)
+        self._thread.join()
+        self._file.close()
+        self._raise_error()
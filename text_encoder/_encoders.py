@@ -2,9 +2,25 @@
 # pylint: disable=too-few-public-methods
 
 from abc import abstractmethod, ABC
+import hashlib
+from itertools import accumulate
+import mmap
+import os
+from queue import Queue
+from threading import Thread, Event
+from time import perf_counter_ns
 
+from text_encoder._checkpoint import Checkpoint, get_checkpoint_path
+from text_encoder._codes import IterableEncryptionKey
+from text_encoder._readers_writers import DEFAULT_BLOCK_SIZE, DEFAULT_BUFFER_SIZE
+from text_encoder._metrics import RunMetrics, current_run, timed_blocks
 from text_encoder._utils import time_it
 
+DEFAULT_RANGE_SIZE = 16 * 1024 * 1024
+DEFAULT_CHECKPOINT_SIZE = 64 * 1024 * 1024
+DEFAULT_QUEUE_DEPTH = 4
+_END = object()
+
 
 class BaseEncoder(ABC):
 
@@ -15,48 +31,206 @@ class BaseEncoder(ABC):
         """This method shall be implemented."""
 
 
+def _never_stop(_char):
+    return False
+
+
 class Encoder(BaseEncoder):
 
-    """Encode input from reader."""
+    """Encode input from reader.
+
+    When ``block_size`` is given and no stop predicate is used, input is
+    read, encoded and written in blocks of up to ``block_size`` chars.
+    Blocks of bytes are encoded into one output buffer reused for every
+    block, so writer shall not keep written blocks.
+    """
 
-    def __init__(self, reader, writer, coder):
+    def __init__(self, reader, writer, coder, block_size=None):
         self._reader = reader
         self._writer = writer
         self._coder = coder
+        self._block_size = block_size
 
     def _encode(self, char):
         return self._coder.encode_char(char)
 
     @time_it
-    def encode(self, stop_predicate=lambda x: False):
+    def encode(self, stop_predicate=None):
         """Encode input from reader.
 
         :param stop_predicate: predicate
         :type stop_predicate: function
 
         """
-        for char in self._reader.read():
-            encoded_char = self._encode(char)
-            self._writer.write(encoded_char)
-            if stop_predicate(char):
+        self._encode_input(stop_predicate)
+
+    def _encode_input(self, stop_predicate):
+        if stop_predicate is None and self._block_size:
+            self._encode_blocks()
+            return
+        stop_predicate = stop_predicate or _never_stop
+        count = 0
+        try:
+            for char in self._reader.read():
+                count += 1
+                encoded_char = self._encode(char)
+                self._writer.write(encoded_char)
+                if stop_predicate(char):
+                    return
+        finally:
+            metrics = current_run()
+            metrics.bytes_in += count
+            metrics.bytes_out += count
+
+    def _encode_blocks(self):
+        metrics = current_run()
+        output = None
+        for block in timed_blocks(self._reader.read_blocks(self._block_size), metrics):
+            start = perf_counter_ns()
+            if isinstance(block, str):
+                encoded = self._coder.encode_block(block)
+            else:
+                if output is None or len(output) < len(block):
+                    output = memoryview(bytearray(len(block)))
+                encoded = output[:self._coder.encode_block_into(block, output)]
+            _write_timed(self._writer, encoded, metrics, start)
+
+
+class PipelinedEncoder(Encoder):
+
+    """Encode input with reading, encoding and writing running concurrently.
+
+    Reader and writer run on their own threads, connected to encoding by
+    queues of up to ``queue_depth`` blocks. Blocks of bytes are copied
+    into buffers of ``block_size`` bytes taken from a pool, and given
+    back once encoded or written, so no buffer is allocated per block.
+    File I/O and compression release the GIL while encoding goes on.
+    Writer shall not keep written blocks.
+    """
+
+    def __init__(self, reader, writer, coder, block_size=DEFAULT_BUFFER_SIZE,
+                 queue_depth=DEFAULT_QUEUE_DEPTH):
+        if queue_depth < 1:
+            raise ValueError('Queue depth shall be at least 1.')
+        super().__init__(reader, writer, coder, block_size)
+        self._queue_depth = queue_depth
+
+    @time_it
+    def encode(self, stop_predicate=None):
+        """Encode input from reader, pipelined unless stop predicate is used.
+
+        :param stop_predicate: predicate
+        :type stop_predicate: function
+
+        """
+        self._encode_input(stop_predicate)
+
+    def _encode_blocks(self):
+        metrics = current_run()
+        # Enough buffers for full queues and one block in every stage.
+        pool = Queue()
+        for _ in range(2 * self._queue_depth + 4):
+            pool.put(bytearray(self._block_size))
+        blocks = Queue(self._queue_depth)
+        encoded_blocks = Queue(self._queue_depth)
+        errors = []
+        stopped = Event()
+        reader = Thread(target=self._read_stage, args=(blocks, pool, stopped, errors, metrics))
+        writer = Thread(target=self._write_stage, args=(encoded_blocks, pool, errors, metrics))
+        reader.start()
+        writer.start()
+        try:
+            self._encode_stage(blocks, encoded_blocks, pool, errors, metrics)
+        finally:
+            stopped.set()
+            _drain(blocks, pool)
+            encoded_blocks.put(_END)
+            reader.join()
+            writer.join()
+        if errors:
+            raise errors[0]
+
+    def _read_stage(self, blocks, pool, stopped, errors, metrics):
+        try:
+            for block in timed_blocks(self._reader.read_blocks(self._block_size), metrics):
+                if not isinstance(block, str):
+                    buffer = pool.get()
+                    memoryview(buffer)[:len(block)] = block
+                    block = (buffer, len(block))
+                blocks.put(block)
+                if stopped.is_set() or errors:
+                    return
+        except Exception as error:  # pylint: disable=broad-except
+            errors.append(error)
+        finally:
+            blocks.put(_END)
+
+    def _encode_stage(self, blocks, encoded_blocks, pool, errors, metrics):
+        while not errors:
+            block = blocks.get()
+            if block is _END:
+                blocks.put(_END)
+                return
+            start = perf_counter_ns()
+            if isinstance(block, str):
+                encoded = self._coder.encode_block(block)
+            else:
+                buffer, size = block
+                output = pool.get()
+                encoded = (output, self._coder.encode_block_into(memoryview(buffer)[:size],
+                                                                 output))
+                pool.put(buffer)
+            metrics.add_phase_time('encode', perf_counter_ns() - start)
+            encoded_blocks.put(encoded)
+
+    def _write_stage(self, encoded_blocks, pool, errors, metrics):
+        while True:
+            block = encoded_blocks.get()
+            if block is _END:
                 return
+            buffer, data = (None, block) if isinstance(block, str) else \
+                (block[0], memoryview(block[0])[:block[1]])
+            if not errors:
+                start = perf_counter_ns()
+                try:
+                    self._writer.write(data)
+                except Exception as error:  # pylint: disable=broad-except
+                    errors.append(error)
+                metrics.add_phase_time('write', perf_counter_ns() - start)
+                metrics.bytes_out += len(data)
+            if buffer is not None:
+                pool.put(buffer)
+
+
+def _drain(blocks, pool):
+    block = None
+    while block is not _END:
+        block = blocks.get()
+        if isinstance(block, tuple):
+            pool.put(block[0])
 
 
 class NullCoder(BaseEncoder):
 
     """Rewrite reader input to output."""
 
-    def __init__(self, reader, writer):
+    def __init__(self, reader, writer, block_size=None):
         self._reader = reader
         self._writer = writer
+        self._block_size = block_size
 
-    def encode(self, stop_predicate=lambda x: False):
+    def encode(self, stop_predicate=None):
         """Rewrite reader input to output until stop condition is met.
 
         :param stop_predicate: predicate
         :type stop_predicate: function
 
         """
+        if stop_predicate is None and self._block_size:
+            for block in self._reader.read_blocks(self._block_size):
+                self._writer.write(block)
+            return
+        stop_predicate = stop_predicate or _never_stop
         for char in self._reader.read():
             self._writer.write(char)
             if stop_predicate(char):
@@ -77,8 +251,514 @@ class HeadedEncoder(BaseEncoder):
         self._is_end_of_header_reached = self._is_end_of_header_predicate(char)
         return self._is_end_of_header_reached
 
-    def encode(self, stop_predicate=lambda x: False):
+    def encode(self, stop_predicate=None):
         """Encode body."""
-        self._header_encoder.encode(lambda x: stop_predicate(x) or self._is_end_of_header(x))
+        is_stop = stop_predicate or _never_stop
+        self._header_encoder.encode(lambda x: is_stop(x) or self._is_end_of_header(x))
         if self._is_end_of_header_reached:
             self._body_encoder.encode(stop_predicate)
+
+
+class DelimitedHeadedEncoder(BaseEncoder):
+
+    """Encode body after header ending with delimiter.
+
+    Delimiter is searched with ``find`` in blocks of input, so header is
+    copied one block at a time and body is encoded in blocks.
+    """
+
+    def __init__(self, reader, writer, coder, header_delimiter, block_size=DEFAULT_BLOCK_SIZE):
+        self._reader = reader
+        self._writer = writer
+        self._coder = coder
+        self._header_delimiter = header_delimiter
+        self._block_size = block_size
+
+    @time_it
+    def encode(self, stop_predicate=None):
+        """Encode body.
+
+        :param stop_predicate: not supported, shall be None
+        :type stop_predicate: function
+
+        """
+        if stop_predicate is not None:
+            raise ValueError('Stop predicate is not supported with header delimiter.')
+        metrics = current_run()
+        blocks = timed_blocks(self._reader.read_blocks(self._block_size), metrics)
+        body = self._copy_header(blocks, metrics)
+        if body is None:
+            return
+        if body:
+            start = perf_counter_ns()
+            _write_timed(self._writer, self._coder.encode_block(body), metrics, start)
+        for block in blocks:
+            start = perf_counter_ns()
+            _write_timed(self._writer, self._coder.encode_block(block), metrics, start)
+
+    def _copy_header(self, blocks, metrics):
+        pending = None
+        for block in blocks:
+            start = perf_counter_ns()
+            block = _as_searchable(block)
+            delimiter = _as_type_of(self._header_delimiter, block)
+            data = block if pending is None else pending + block
+            index = data.find(delimiter)
+            if index >= 0:
+                end_of_header = index + len(delimiter)
+                _write_timed(self._writer, data[:end_of_header], metrics, start)
+                return data[end_of_header:]
+            split = len(data) - len(delimiter) + 1
+            if split > 0:
+                _write_timed(self._writer, data[:split], metrics, start)
+            pending = data[max(split, 0):]
+        if pending:
+            _write_timed(self._writer, pending, metrics, perf_counter_ns())
+        return None
+
+
+class RecordEncoder(BaseEncoder):
+
+    """Encode bodies of records, leaving their headers not encoded.
+
+    Input is a sequence of records ending with ``record_delimiter``.
+    Record header runs up to the first ``header_delimiter`` in record
+    and rest of record is body. Record without header delimiter is all
+    header. Delimiters are written not encoded. Records are split in
+    blocks of input, and all bodies of a block are encoded at once unless
+    key is reset at the start of every body.
+    """
+
+    def __init__(self, reader, writer, coder, record_delimiter, header_delimiter,
+                 reset_key=False, block_size=DEFAULT_BLOCK_SIZE):
+        self._reader = reader
+        self._writer = writer
+        self._coder = coder
+        self._record_delimiter = record_delimiter
+        self._header_delimiter = header_delimiter
+        self._reset_key = reset_key
+        self._block_size = block_size
+        self._in_body = False
+
+    @time_it
+    def encode(self, stop_predicate=None):
+        """Encode bodies of all records.
+
+        :param stop_predicate: not supported, shall be None
+        :type stop_predicate: function
+
+        """
+        if stop_predicate is not None:
+            raise ValueError('Stop predicate is not supported in record encoding.')
+        self._in_body = False
+        metrics = current_run()
+        pending = None
+        for block in timed_blocks(self._reader.read_blocks(self._block_size), metrics):
+            start = perf_counter_ns()
+            block = _as_searchable(block)
+            pending = self._encode_records(block if pending is None else pending + block,
+                                           metrics, start)
+        if pending:
+            self._encode_records(pending, metrics, perf_counter_ns(), is_last=True)
+
+    def _encode_records(self, data, metrics, start, is_last=False):
+        record_delimiter = _as_type_of(self._record_delimiter, data)
+        header_delimiter = _as_type_of(self._header_delimiter, data)
+        records = data.split(record_delimiter)
+        last_record = records.pop()
+        parts = []
+        if records and self._in_body:
+            parts.append((data[:0], records.pop(0), False))
+            self._in_body = False
+        for record in records:
+            header, delimiter, body = record.partition(header_delimiter)
+            parts.append((header + delimiter, body, bool(delimiter)))
+        pending, last_part = self._split_last_record(last_record, header_delimiter,
+                                                     record_delimiter, is_last)
+        parts.append(last_part)
+        bodies = self._encode_bodies(parts, data[:0])
+        output = [header + body for (header, _, _), body in zip(parts, bodies)]
+        self._write(record_delimiter.join(output), metrics, start)
+        return pending
+
+    def _split_last_record(self, record, header_delimiter, record_delimiter, is_last):
+        header = record[:0]
+        is_body_start = False
+        if not self._in_body:
+            index = record.find(header_delimiter)
+            end_of_header = index + len(header_delimiter)
+            if index < 0 or not (is_last or
+                                 end_of_header <= len(record) - len(record_delimiter) + 1):
+                split = len(record) if is_last else max(
+                    len(record) - max(len(header_delimiter), len(record_delimiter)) + 1, 0)
+                if index >= 0:
+                    split = min(split, index)
+                return record[split:], (record[:split], header, False)
+            header, record = record[:end_of_header], record[end_of_header:]
+            self._in_body = is_body_start = True
+        split = len(record) if is_last else max(len(record) - len(record_delimiter) + 1, 0)
+        return record[split:], (header, record[:split], is_body_start)
+
+    def _encode_bodies(self, parts, empty):
+        if not self._reset_key:
+            return self._encode_at_once([body for _, body, _ in parts], empty)
+        # Padding bodies to key period costs more than encoding them one by one
+        # once key is longer than bodies.
+        if self._coder.key_period is None or \
+                self._coder.key_period * len(parts) > sum(len(body) for _, body, _ in parts):
+            return [self._encode_body(body, is_body_start) for _, body, is_body_start in parts]
+        return self._encode_from_key_start(parts, empty)
+
+    def _encode_from_key_start(self, parts, empty):
+        encoded = []
+        if not parts[0][2]:
+            encoded.append(self._encode_body(parts[0][1], False))
+            parts = parts[1:]
+        if not parts:
+            return encoded
+        self._coder.reset()
+        filler = _as_type_of('a', empty)
+        bodies = [body + filler * (-self._coder.count_key_uses(body) % self._coder.key_period)
+                  for _, body, _ in parts[:-1]]
+        bodies.append(parts[-1][1])
+        padded = self._encode_at_once(bodies, empty)
+        encoded.extend(chunk[:len(body)] for chunk, (_, body, _) in zip(padded, parts))
+        return encoded
+
+    def _encode_at_once(self, bodies, empty):
+        lengths = [len(body) for body in bodies]
+        joined = empty.join(bodies)
+        encoded = self._coder.encode_block(joined) if joined else joined
+        ends = list(accumulate(lengths))
+        return [encoded[end - length:end] for end, length in zip(ends, lengths)]
+
+    def _encode_body(self, body, is_body_start):
+        if is_body_start:
+            self._coder.reset()
+        return self._coder.encode_block(body) if body else body
+
+    def _write(self, output, metrics, start):
+        if output:
+            _write_timed(self._writer, output, metrics, start)
+
+
+# Time since start, when encoding of data began, goes to encode phase.
+def _write_timed(writer, data, metrics, start):
+    encoded_time = perf_counter_ns()
+    writer.write(data)
+    metrics.add_phase_time('encode', encoded_time - start)
+    metrics.add_phase_time('write', perf_counter_ns() - encoded_time)
+    metrics.bytes_out += len(data)
+
+
+def _as_searchable(block):
+    return block if isinstance(block, (str, bytes)) else bytes(block)
+
+
+def _as_type_of(delimiter, block):
+    if isinstance(block, str):
+        return delimiter.decode('latin-1') if isinstance(delimiter, bytes) else delimiter
+    return delimiter.encode('latin-1') if isinstance(delimiter, str) else delimiter
+
+
+class AsyncEncoder:
+
+    """Encode asynchronous reader input block by block.
+
+    Control goes back to event loop after every block, and writer
+    backpressure is awaited before the next block is read.
+    """
+
+    def __init__(self, reader, writer, coder, block_size=DEFAULT_BLOCK_SIZE):
+        self._reader = reader
+        self._writer = writer
+        self._coder = coder
+        self._block_size = block_size
+
+    async def encode(self):
+        """Encode input from reader until its end and finish writer."""
+        from asyncio import sleep  # pylint: disable=import-outside-toplevel
+        async for block in self._reader.read_blocks(self._block_size):
+            await self._writer.write(self._coder.encode_block(block))
+            await sleep(0)
+        await self._writer.finish()
+
+
+class ParallelEncoder(BaseEncoder):
+
+    """Encode file in byte ranges on worker processes.
+
+    Codes are length preserving, so every range is encoded on its own
+    and written at the same offset of the output file. Each range starts
+    with the key phase it would have in serial encoding. Phase times are
+    summed over workers, so they may add up to more than elapsed time.
+    """
+
+    def __init__(self, in_path, out_path, coder_type, key, workers=None,
+                 header_delimiter=None, range_size=DEFAULT_RANGE_SIZE):
+        self._in_path = in_path
+        self._out_path = out_path
+        self._coder_type = coder_type
+        self._key = key
+        self._workers = workers
+        self._header_delimiter = header_delimiter
+        self._range_size = range_size
+
+    @time_it
+    def encode(self, stop_predicate=None):
+        """Encode input file into output file.
+
+        :param stop_predicate: not supported, shall be None
+        :type stop_predicate: function
+
+        """
+        if stop_predicate is not None:
+            raise ValueError('Stop predicate is not supported in parallel encoding.')
+        import concurrent.futures  # pylint: disable=import-outside-toplevel
+        metrics = current_run()
+        size = os.path.getsize(self._in_path)
+        body_start = self._get_body_start(size)
+        with open(self._out_path, 'wb') as file:
+            file.truncate(size)
+        metrics.add_run(_copy_range(self._in_path, self._out_path, 0, body_start))
+        ranges = [(start, min(start + self._range_size, size))
+                  for start in range(body_start, size, self._range_size)]
+        with concurrent.futures.ProcessPoolExecutor(self._workers) as executor:
+            key_uses_before = self._get_key_uses_before(executor, ranges)
+            futures = [executor.submit(_encode_range, self._in_path, self._out_path,
+                                       self._coder_type, self._key, start, end, key_uses)
+                       for (start, end), key_uses in zip(ranges, key_uses_before)]
+            for future in futures:
+                metrics.add_run(future.result())
+
+    def _get_body_start(self, size):
+        if self._header_delimiter is None or not size:
+            return 0
+        with open(self._in_path, 'rb') as file:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                end_of_header = _find_end_of_header(buffer, self._header_delimiter,
+                                                    DEFAULT_BUFFER_SIZE)
+        return size if end_of_header is None else end_of_header
+
+    def _get_key_uses_before(self, executor, ranges):
+        if not isinstance(self._key, IterableEncryptionKey):
+            return [0] * len(ranges)
+        if self._coder_type.uses_key_per_char:
+            key_uses = [end - start for start, end in ranges]
+        else:
+            key_uses = executor.map(_count_key_uses, [self._in_path] * len(ranges),
+                                    [self._coder_type] * len(ranges), ranges)
+        return list(accumulate([0] + list(key_uses)[:-1]))
+
+
+class CheckpointedEncoder(BaseEncoder):
+
+    """Encode input file into output file, saving checkpoints in sidecar file.
+
+    Checkpoint is saved after every ``checkpoint_size`` bytes of output,
+    once output is flushed to disk. With ``resume`` encoding continues
+    from the saved checkpoint, dropping output written after it, so the
+    output is the same as of an uninterrupted run. Like in HeadedEncoder,
+    everything up to and including the first header_delimiter is left as
+    is. Checkpoint file is removed when encoding completes.
+    """
+
+    def __init__(self, in_path, out_path, coder_type, key, header_delimiter=None, resume=False,
+                 checkpoint_size=DEFAULT_CHECKPOINT_SIZE, block_size=DEFAULT_BUFFER_SIZE,
+                 checkpoint_path=None):
+        self._in_path = in_path
+        self._out_path = out_path
+        self._coder_type = coder_type
+        self._key = key
+        self._header_delimiter = _as_type_of(header_delimiter, b'') if header_delimiter else None
+        self._resume = resume
+        self._checkpoint_size = checkpoint_size
+        self._block_size = block_size
+        self._checkpoint_path = checkpoint_path or get_checkpoint_path(out_path)
+
+    @time_it
+    def encode(self, stop_predicate=None):
+        """Encode input file into output file.
+
+        :param stop_predicate: not supported, shall be None
+        :type stop_predicate: function
+        :raises ValueError: if checkpoint was saved for input of other size, or for other
+            codec, key or header delimiter
+
+        """
+        if stop_predicate is not None:
+            raise ValueError('Stop predicate is not supported in checkpointed encoding.')
+        checkpoint = self._get_start_checkpoint()
+        self._key.seek(checkpoint.key_phase)
+        coder = self._coder_type(self._key)
+        with open(self._in_path, 'rb') as in_file, \
+                open(self._out_path, 'r+b' if checkpoint.out_offset else 'wb') as out_file:
+            in_file.seek(checkpoint.in_offset)
+            out_file.seek(checkpoint.out_offset)
+            out_file.truncate()
+            self._encode_file(in_file, out_file, coder, checkpoint)
+        if os.path.exists(self._checkpoint_path):
+            os.remove(self._checkpoint_path)
+
+    def _get_start_checkpoint(self):
+        start = Checkpoint(
+            header_passed=self._header_delimiter is None, in_size=os.path.getsize(self._in_path),
+            codec='{}.{}'.format(self._coder_type.__module__, self._coder_type.__qualname__),
+            key_digest=_get_key_digest(self._key),
+            header_delimiter=self._header_delimiter and self._header_delimiter.decode('latin-1'))
+        checkpoint = Checkpoint.load(self._checkpoint_path) if self._resume else None
+        if checkpoint is None:
+            return start
+        if checkpoint.in_size != start.in_size:
+            raise ValueError('Checkpoint does not match input file.')
+        if (checkpoint.codec, checkpoint.key_digest, checkpoint.header_delimiter) != \
+                (start.codec, start.key_digest, start.header_delimiter):
+            raise ValueError('Checkpoint does not match codec, key or header delimiter.')
+        return checkpoint
+
+    def _encode_file(self, in_file, out_file, coder, checkpoint):
+        metrics = current_run()
+        output = memoryview(bytearray(self._block_size + len(self._header_delimiter or b'')))
+        next_checkpoint = checkpoint.out_offset + self._checkpoint_size
+        pending = b''
+        for block in timed_blocks(_read_blocks_into(in_file, bytearray(self._block_size)),
+                                  metrics):
+            if not checkpoint.header_passed:
+                pending = self._copy_header(out_file, pending + block, checkpoint)
+                if checkpoint.header_passed:
+                    block, pending = pending, b''
+            if checkpoint.header_passed:
+                start = perf_counter_ns()
+                encoded = output[:coder.encode_block_into(block, output)]
+                metrics.add_phase_time('encode', perf_counter_ns() - start)
+                self._write(out_file, encoded, len(block), checkpoint)
+                checkpoint.key_phase = self._key.tell()
+            if checkpoint.out_offset >= next_checkpoint:
+                self._save_checkpoint(out_file, checkpoint)
+                next_checkpoint = checkpoint.out_offset + self._checkpoint_size
+        self._write(out_file, pending, len(pending), checkpoint)
+
+    def _copy_header(self, out_file, data, checkpoint):
+        index = data.find(self._header_delimiter)
+        if index >= 0:
+            end_of_header = index + len(self._header_delimiter)
+            self._write(out_file, data[:end_of_header], end_of_header, checkpoint)
+            checkpoint.header_passed = True
+            return data[end_of_header:]
+        split = max(len(data) - len(self._header_delimiter) + 1, 0)
+        self._write(out_file, data[:split], split, checkpoint)
+        return data[split:]
+
+    @staticmethod
+    def _write(out_file, data, consumed, checkpoint):
+        start = perf_counter_ns()
+        out_file.write(data)
+        metrics = current_run()
+        metrics.add_phase_time('write', perf_counter_ns() - start)
+        metrics.bytes_out += len(data)
+        checkpoint.in_offset += consumed
+        checkpoint.out_offset += len(data)
+
+    def _save_checkpoint(self, out_file, checkpoint):
+        out_file.flush()
+        os.fsync(out_file.fileno())
+        checkpoint.save(self._checkpoint_path)
+
+
+def _get_key_digest(key):
+    keys = key.slice(0, len(key) if isinstance(key, IterableEncryptionKey) else 1)
+    return hashlib.sha256('{}{}'.format(type(key).__name__, keys).encode()).hexdigest()
+
+
+def _read_blocks_into(file, buffer):
+    view = memoryview(buffer)
+    while True:
+        size = file.readinto(buffer)
+        if not size:
+            return
+        yield view[:size]
+
+
+def _read_range(path, start, end):
+    with open(path, 'rb') as file:
+        file.seek(start)
+        while start < end:
+            block = file.read(min(DEFAULT_BUFFER_SIZE, end - start))
+            if not block:
+                return
+            start += len(block)
+            yield block
+
+
+def _copy_range(in_path, out_path, start, end):
+    metrics = RunMetrics(None)
+    with open(out_path, 'r+b') as file:
+        file.seek(start)
+        for block in timed_blocks(_read_range(in_path, start, end), metrics):
+            _write_timed(file, block, metrics, perf_counter_ns())
+    return metrics
+
+
+def _count_key_uses(path, coder_type, byte_range):
+    return sum(coder_type.count_key_uses(block) for block in _read_range(path, *byte_range))
+
+
+def _encode_range(in_path, out_path, coder_type, key, start, end, key_uses_before):
+    key.seek(key.tell() + key_uses_before)
+    coder = coder_type(key)
+    metrics = RunMetrics(None)
+    with open(out_path, 'r+b') as file:
+        file.seek(start)
+        for block in timed_blocks(_read_range(in_path, start, end), metrics):
+            encode_start = perf_counter_ns()
+            _write_timed(file, coder.encode_block(block), metrics, encode_start)
+    return metrics
+
+
+def encode_inplace(path_or_buffer, coder, header_delimiter=None, block_size=DEFAULT_BUFFER_SIZE):
+    """Encode file or writable buffer in place, block by block.
+
+    Like in HeadedEncoder, everything up to and including the first
+    header_delimiter is left as is. If the delimiter is not found,
+    nothing is encoded.
+
+    :param path_or_buffer: file path, bytearray, writable memoryview or mmap
+    :type path_or_buffer: str or bytearray or memoryview or mmap.mmap
+    :param coder: length preserving coder
+    :type coder: Coder
+    :param header_delimiter: end of header marker, None if there is no header
+    :type header_delimiter: str or bytes
+    :param block_size: number of bytes encoded at once
+    :type block_size: int
+    """
+    if isinstance(path_or_buffer, (bytearray, memoryview, mmap.mmap)):
+        _encode_buffer_inplace(path_or_buffer, coder, header_delimiter, block_size)
+        return
+    with open(path_or_buffer, 'r+b') as file:
+        if os.fstat(file.fileno()).st_size:
+            with mmap.mmap(file.fileno(), 0) as buffer:
+                _encode_buffer_inplace(buffer, coder, header_delimiter, block_size)
+                buffer.flush()
+
+
+def _encode_buffer_inplace(buffer, coder, header_delimiter, block_size):
+    start = 0
+    if header_delimiter is not None:
+        start = _find_end_of_header(buffer, header_delimiter, block_size)
+        if start is None:
+            return
+    for position in range(start, len(buffer), block_size):
+        end = min(position + block_size, len(buffer))
+        buffer[position:end] = coder.encode_block(buffer[position:end])
+
+
+def _find_end_of_header(buffer, header_delimiter, block_size):
+    if isinstance(header_delimiter, str):
+        header_delimiter = header_delimiter.encode('latin-1')
+    overlap = len(header_delimiter) - 1
+    for position in range(0, len(buffer), block_size):
+        start = max(position - overlap, 0)
+        index = bytes(buffer[start:position + block_size]).find(header_delimiter)
+        if index != -1:
+            return start + index + len(header_delimiter)
+    return None
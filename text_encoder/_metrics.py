@@ -0,0 +1,188 @@
+"""Encoding metrics and their sinks."""
+# pylint: disable=too-few-public-methods
+
+from abc import abstractmethod, ABC
+from contextvars import ContextVar
+import json
+import logging
+from time import perf_counter_ns
+
+PHASES = ('read', 'encode', 'write')
+
+
+class RunMetrics:
+
+    """Metrics of a single run of encoding function.
+
+    Bytes are counted as lengths of blocks, so a char of text read in
+    latin-1 counts as one byte.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.elapsed_ns = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.blocks = 0
+        self.phases_ns = dict.fromkeys(PHASES, 0)
+
+    def add_phase_time(self, phase, elapsed_ns):
+        """Add time spent in phase.
+
+        :param phase: phase name
+        :type phase: str
+        :param elapsed_ns: time in nanoseconds
+        :type elapsed_ns: int
+        """
+        self.phases_ns[phase] += elapsed_ns
+
+    def add_run(self, other):
+        """Add bytes, blocks and phase times of other run, like of a worker.
+
+        :param other: run metrics
+        :type other: RunMetrics
+        """
+        self.bytes_in += other.bytes_in
+        self.bytes_out += other.bytes_out
+        self.blocks += other.blocks
+        for phase, elapsed_ns in other.phases_ns.items():
+            self.add_phase_time(phase, elapsed_ns)
+
+    def as_dict(self):
+        """Get metrics with derived throughput.
+
+        :return: metrics
+        :rtype: dict
+        """
+        seconds = self.elapsed_ns / 1e9
+        return {'name': self.name, 'elapsed_ns': self.elapsed_ns, 'bytes_in': self.bytes_in,
+                'bytes_out': self.bytes_out, 'blocks': self.blocks,
+                'phases_ns': dict(self.phases_ns),
+                'mb_per_s': self.bytes_in / seconds / 1e6 if seconds else 0.0}
+
+
+_current_run = ContextVar('current_run', default=None)
+
+
+def current_run():
+    """Get metrics of the innermost measured run.
+
+    Outside of measured run, metrics are collected into a throwaway object.
+
+    :return: run metrics
+    :rtype: RunMetrics
+    """
+    return _current_run.get() or RunMetrics(None)
+
+
+def timed_blocks(blocks, metrics):
+    """Iterate over blocks, adding read time and sizes to metrics.
+
+    :param blocks: blocks to iterate
+    :type blocks: iterator
+    :param metrics: run metrics
+    :type metrics: RunMetrics
+    :return: block_iterator
+    :rtype: iterator
+    """
+    blocks = iter(blocks)
+    while True:
+        start = perf_counter_ns()
+        block = next(blocks, None)
+        metrics.add_phase_time('read', perf_counter_ns() - start)
+        if block is None:
+            return
+        metrics.bytes_in += len(block)
+        metrics.blocks += 1
+        yield block
+
+
+class MetricsSink(ABC):
+
+    """Metrics sink interface."""
+
+    @abstractmethod
+    def emit(self, metrics):
+        """This method shall be implemented."""
+
+
+class LoggingSink(MetricsSink):
+
+    """Log metrics with logging module."""
+
+    def __init__(self, level=logging.INFO):
+        self._level = level
+
+    def emit(self, metrics):
+        """Log metrics in one line.
+
+        :param metrics: metrics
+        :type metrics: dict
+        """
+        if not logging.getLogger().isEnabledFor(self._level):
+            return
+        phases = ', '.join('{} {:.2f}'.format(phase, elapsed_ns / 1e9)
+                           for phase, elapsed_ns in metrics['phases_ns'].items() if elapsed_ns)
+        logging.log(self._level, '{} complete in {:.2f} seconds.{}'.format(
+            metrics['name'], metrics['elapsed_ns'] / 1e9,
+            ' {} bytes in, {} bytes out, {:.2f} MB/s, seconds of {}.'.format(
+                metrics['bytes_in'], metrics['bytes_out'], metrics['mb_per_s'], phases)
+            if phases else ''))
+
+
+class JsonLinesSink(MetricsSink):
+
+    """Append metrics to file, one JSON object per line."""
+
+    def __init__(self, path):
+        self._path = path
+
+    def emit(self, metrics):
+        """Append metrics line to file.
+
+        :param metrics: metrics
+        :type metrics: dict
+        """
+        with open(self._path, 'a') as file:
+            file.write(json.dumps(metrics) + '\n')
+
+
+class InMemorySink(MetricsSink):
+
+    """Collect metrics in a list."""
+
+    def __init__(self):
+        self.records = []
+
+    def emit(self, metrics):
+        """Collect metrics.
+
+        :param metrics: metrics
+        :type metrics: dict
+        """
+        self.records.append(metrics)
+
+
+_sinks = [LoggingSink()]
+
+
+def set_metrics_sinks(*sinks):
+    """Replace sinks metrics are reported to.
+
+    :param sinks: metrics sinks
+    :type sinks: MetricsSink
+    """
+    _sinks[:] = sinks
+
+
+def emit_metrics(metrics):
+    """Report metrics to all sinks.
+
+    :param metrics: run metrics
+    :type metrics: RunMetrics
+    """
+    if not _sinks:
+        return
+    record = metrics.as_dict()
+    for sink in _sinks:
+        sink.emit(record)
@@ -0,0 +1,54 @@
+"""Profiling of encoding runs."""
+
+import cProfile
+import pstats
+import sys
+import tracemalloc
+
+
+def profile(function, stats_path, top=20, stream=None):
+    """Run function under cProfile, dump pstats file and print hottest functions.
+
+    :param function: function run without arguments
+    :type function: function
+    :param stats_path: pstats output file path
+    :type stats_path: str
+    :param top: number of functions printed
+    :type top: int
+    :param stream: summary output, standard error by default
+    :type stream: file
+    :return: function result
+    """
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(function)
+    finally:
+        profiler.dump_stats(stats_path)
+        stats = pstats.Stats(profiler, stream=stream or sys.stderr)
+        stats.sort_stats(pstats.SortKey.TIME).print_stats(top)
+
+
+def trace_allocations(function, snapshot_path, top=20, stream=None):
+    """Run function tracing allocations, dump snapshot and print top allocating lines.
+
+    :param function: function run without arguments
+    :type function: function
+    :param snapshot_path: tracemalloc snapshot output file path
+    :type snapshot_path: str
+    :param top: number of lines printed
+    :type top: int
+    :param stream: summary output, standard error by default
+    :type stream: file
+    :return: function result
+    """
+    tracemalloc.start()
+    try:
+        return function()
+    finally:
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, tracemalloc.__file__)])
+        tracemalloc.stop()
+        snapshot.dump(snapshot_path)
+        stream = stream or sys.stderr
+        for statistic in snapshot.statistics('lineno')[:top]:
+            print(statistic, file=stream)
@@ -2,12 +2,20 @@
 # pylint: disable=too-few-public-methods
 
 from abc import abstractmethod, ABC
-from os import fsync
+from io import BytesIO
+import mmap
+from os import fsync, path as os_path
 import sys
+from time import monotonic
 
-
+from text_encoder._compression import (DEFAULT_QUEUE_DEPTH, ReadAheadFile, WriteBehindFile,
+                                       detect_compression, get_compression_by_extension,
+                                       open_compressed)
 from text_encoder._encoding_process import EncodingDoneObserver
 
+DEFAULT_BLOCK_SIZE = 64 * 1024
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+
 
 class Reader(ABC):
 
@@ -17,13 +25,36 @@ class Reader(ABC):
     def read(self):
         """This method shall be implemented."""
 
+    def read_blocks(self, block_size=DEFAULT_BLOCK_SIZE):
+        """Read input in blocks.
+
+        Falls back to grouping chars returned by ``read``. Blocks and
+        chars are taken from the same position, so both ways of reading
+        can be mixed.
+
+        :param block_size: maximal number of chars in block
+        :type block_size: int
+        :return: block_iterator
+        :rtype: iterator
+        """
+        block = []
+        for char in self.read():
+            block.append(char)
+            if len(block) == block_size:
+                yield block[0][:0].join(block)
+                block = []
+        if block:
+            yield block[0][:0].join(block)
+
 
 class StringReader(Reader):
 
     """Read string."""
 
     def __init__(self, input_string):
-        self._char_iterator = self._get_char(input_string)
+        self._string = input_string
+        self._position = 0
+        self._char_iterator = self._get_char()
 
     def read(self):
         """Read string one byte at a time.
@@ -33,28 +64,180 @@ class StringReader(Reader):
         """
         return self._char_iterator
 
-    @staticmethod
-    def _get_char(string):
-        for char in string:
+    def read_blocks(self, block_size=DEFAULT_BLOCK_SIZE):
+        """Read string in slices of block_size chars.
+
+        :param block_size: maximal number of chars in block
+        :type block_size: int
+        :return: block_iterator
+        :rtype: iterator
+        """
+        while self._position < len(self._string):
+            block = self._string[self._position:self._position + block_size]
+            self._position += len(block)
+            yield block
+
+    def _get_char(self):
+        while self._position < len(self._string):
+            char = self._string[self._position]
+            self._position += 1
             yield char
 
 
 class FileReader(Reader):
 
-    """Read file one byte at a time."""
+    """Read file through a buffer of buffer_size bytes.
+
+    In binary mode blocks are not decoded, but read into one preallocated
+    buffer, which is reused for every block.
+    """
+
+    def __init__(self, path, buffer_size=DEFAULT_BUFFER_SIZE, binary=False):
+        self._path = path
+        self._buffer_size = buffer_size
+        self._binary = binary
+        self._file = None
+        self._char_iterator = self._get_char_from_file()
+
+    def _open_file(self):
+        if self._file is None:
+            self._file = open(self._path, 'rb', buffering=self._buffer_size)
+
+    def _close_file(self):
+        self._file.close()
+        self._file = BytesIO()
+
+    def _get_char_from_file(self):
+        self._open_file()
+        while True:
+            char = self._file.read(1)
+            if char:
+                yield char
+            else:
+                self._close_file()
+                break  # pragma no cover
+
+    def read(self):
+        """Read file one byte at a time.
+
+        :return: char_iterator
+        :rtype: iterator
+        """
+        return self._char_iterator
+
+    def read_blocks(self, block_size=DEFAULT_BLOCK_SIZE):
+        """Read file in blocks served from the file buffer.
+
+        Bytes are decoded as latin-1, so every byte becomes one char. In
+        binary mode blocks are memoryviews valid until the next block is
+        read.
+
+        :param block_size: maximal number of chars in block
+        :type block_size: int
+        :return: block_iterator
+        :rtype: iterator
+        """
+        self._open_file()
+        if self._binary:
+            yield from self._read_binary_blocks(block_size)
+            return
+        while True:
+            block = self._file.read(block_size)
+            if not block:
+                self._close_file()
+                return
+            yield block.decode('latin-1')
+
+    def _read_binary_blocks(self, block_size):
+        buffer = memoryview(bytearray(block_size))
+        while True:
+            size = self._file.readinto(buffer)
+            if not size:
+                self._close_file()
+                return
+            yield buffer[:size]
+
+
+class CompressedFileReader(FileReader):
+
+    """Read compressed file, decompressed on background thread.
+
+    Compression is detected from magic bytes or extension of file, unless
+    given. Up to queue_depth chunks of buffer_size bytes are decompressed
+    ahead of reading.
+    """
+
+    def __init__(self, path, compression=None, buffer_size=DEFAULT_BUFFER_SIZE, binary=False,
+                 queue_depth=DEFAULT_QUEUE_DEPTH):
+        super().__init__(path, buffer_size, binary)
+        self._compression = compression
+        self._queue_depth = queue_depth
+
+    def _open_file(self):
+        if self._file is None:
+            compression = self._compression or detect_compression(self._path)
+            file = open_compressed(self._path, 'rb', compression) if compression else \
+                open(self._path, 'rb')
+            self._file = ReadAheadFile(file, self._buffer_size, self._queue_depth)
+
+
+class StdinReader(FileReader):
+
+    """Read binary standard input in blocks."""
+
+    def __init__(self, binary=False):
+        super().__init__(None, binary=binary)
+
+    def _open_file(self):
+        if self._file is None:
+            self._file = sys.stdin.buffer
+
+    def _close_file(self):
+        self._file = BytesIO()
+
+
+class MmapFileReader(Reader):
+
+    """Read memory mapped file.
+
+    Blocks are bytes sliced from the mapping, nothing is decoded.
+    """
 
     def __init__(self, path):
-        self._char_iterator = self._get_char_from_file(path)
-
-    @staticmethod
-    def _get_char_from_file(path):
-        with open(path, 'rb') as file:
-            while True:
-                char = file.read(1)
-                if char:
-                    yield char
-                else:
-                    break  # pragma no cover
+        self._path = path
+        self._map = None
+        self._size = 0
+        self._position = 0
+        self._char_iterator = self._get_char_from_map()
+
+    @property
+    def size(self):
+        """Input file size.
+
+        :return: size in bytes
+        :rtype: int
+        """
+        return os_path.getsize(self._path)
+
+    def _open_map(self):
+        if self._map is None:
+            self._size = self.size
+            self._map = b''
+            if self._size:
+                with open(self._path, 'rb') as file:
+                    self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _close_map(self):
+        if self._size:
+            self._map.close()
+
+    def _get_char_from_map(self):
+        self._open_map()
+        while self._position < self._size:
+            position = self._position
+            self._position = position + 1
+            yield self._map[position:position + 1]
+        self._close_map()
 
     def read(self):
         """Read file one byte at a time.
@@ -64,13 +247,28 @@ class FileReader(Reader):
         """
         return self._char_iterator
 
+    def read_blocks(self, block_size=DEFAULT_BUFFER_SIZE):
+        """Read file in blocks of bytes.
+
+        :param block_size: maximal number of bytes in block
+        :type block_size: int
+        :return: block_iterator
+        :rtype: iterator
+        """
+        self._open_map()
+        while self._position < self._size:
+            block = self._map[self._position:self._position + block_size]
+            self._position += len(block)
+            yield block
+        self._close_map()
 
-class ConsoleReader(Reader):
+
+class ConsoleReader(StringReader):
 
     """Read console."""
 
     def __init__(self):
-        self._char_iterator = self._get_char(input("Provide text to encode: "))
+        super().__init__(input("Provide text to encode: "))
 
     def read(self):
         """Read console input one byte at a time.
@@ -80,11 +278,6 @@ class ConsoleReader(Reader):
         """
         return self._char_iterator
 
-    @staticmethod
-    def _get_char(string):
-        for char in string:
-            yield char
-
 
 class Writer(ABC):
 
@@ -97,13 +290,18 @@ class Writer(ABC):
 
 class StringWriter(Writer):
 
-    """Write text to string output."""
+    """Write text to string output.
+
+    Bytes are decoded as latin-1, so every byte becomes one char.
+    """
 
     def __init__(self):
         self._output = []
 
     def write(self, _input):
         """Write letter to string"""
+        if not isinstance(_input, str):
+            _input = bytes(_input).decode('latin-1')
         self._output.append(_input)
 
     def get(self):
@@ -115,21 +313,182 @@ class StringWriter(Writer):
         return ''.join(self._output)
 
 
+class DurabilityPolicy(ABC):
+
+    """File writer durability policy interface."""
+
+    sync_on_finish = True
+
+    @abstractmethod
+    def is_sync_due(self, written_size):
+        """This method shall be implemented."""
+
+
+class NoSync(DurabilityPolicy):
+
+    """Never sync file to disk, leave it to the operating system."""
+
+    sync_on_finish = False
+
+    def is_sync_due(self, written_size):
+        """Never sync while writing."""
+        return False
+
+
+class SyncOnFinish(DurabilityPolicy):
+
+    """Sync file to disk once, when writing is finished."""
+
+    def is_sync_due(self, written_size):
+        """Never sync while writing."""
+        return False
+
+
+class SyncEveryBytes(DurabilityPolicy):
+
+    """Sync file to disk every time size bytes are written."""
+
+    def __init__(self, size):
+        self._size = size
+        self._pending_size = 0
+
+    def is_sync_due(self, written_size):
+        """Check if size bytes were written since last sync."""
+        self._pending_size += written_size
+        if self._pending_size >= self._size:
+            self._pending_size = 0
+            return True
+        return False
+
+
+class SyncEverySeconds(DurabilityPolicy):
+
+    """Sync file to disk if interval seconds passed since last sync."""
+
+    def __init__(self, interval):
+        self._interval = interval
+        self._last_sync_time = monotonic()
+
+    def is_sync_due(self, written_size):
+        """Check if interval passed since last sync."""
+        now = monotonic()
+        if now - self._last_sync_time >= self._interval:
+            self._last_sync_time = now
+            return True
+        return False
+
+
 class FileWriter(Writer, EncodingDoneObserver):
 
-    """Write text to file output."""
+    """Write text to file output.
 
-    def __init__(self, path):
-        self._file = open(path, 'w')
+    Output goes through a buffer of buffer_size bytes and is synced to
+    disk according to durability policy, by default once on finish. In
+    binary mode file is written in bytes, text being encoded as latin-1.
+    In text mode bytes are decoded as latin-1.
+    """
+
+    def __init__(self, path, durability=None, buffer_size=DEFAULT_BUFFER_SIZE, binary=False):
+        self._file = self._open_file(path, buffer_size, binary)
+        self._binary = binary
+        self._durability = durability or SyncOnFinish()
+
+    def _open_file(self, path, buffer_size, binary):
+        return open(path, 'wb' if binary else 'w', buffering=buffer_size)
 
     def write(self, _input):
         """Write letter to file."""
+        if self._binary and isinstance(_input, str):
+            _input = _input.encode('latin-1')
+        elif not self._binary and not isinstance(_input, str):
+            _input = bytes(_input).decode('latin-1')
         self._file.write(_input)
+        if self._durability.is_sync_due(len(_input)):
+            self._sync()
+
+    def _sync(self):
         self._file.flush()
         fsync(self._file.fileno())
 
     def finish(self):
         """Finish file operations."""
+        if self._durability.sync_on_finish:
+            self._sync()
+        self._file.close()
+
+
+class CompressedFileWriter(FileWriter):
+
+    """Write compressed file, compressed on background thread.
+
+    Compression is detected from extension of file, unless given. Text is
+    encoded as latin-1. Written data is compressed in chunks of at least
+    buffer_size bytes, and up to queue_depth chunks wait for compression.
+    On finish compressor is closed, writing its trailer, before file is
+    synced to disk.
+    """
+
+    def __init__(self, path, compression=None, durability=None,
+                 buffer_size=DEFAULT_BUFFER_SIZE, queue_depth=DEFAULT_QUEUE_DEPTH):
+        self._compression = compression or get_compression_by_extension(path)
+        self._queue_depth = queue_depth
+        self._raw_file = None
+        super().__init__(path, durability, buffer_size, binary=True)
+
+    def _open_file(self, path, buffer_size, binary):
+        self._raw_file = open(path, 'wb')
+        try:
+            compressed_file = open_compressed(self._raw_file, 'wb', self._compression)
+        except Exception:
+            self._raw_file.close()
+            raise
+        return WriteBehindFile(compressed_file, buffer_size, self._queue_depth)
+
+    def _sync(self):
+        self._file.flush()
+        self._sync_raw_file()
+
+    def _sync_raw_file(self):
+        self._raw_file.flush()
+        fsync(self._raw_file.fileno())
+
+    def finish(self):
+        """Close compressor, then sync and close file."""
+        try:
+            self._file.close()
+            if self._durability.sync_on_finish:
+                self._sync_raw_file()
+        finally:
+            self._raw_file.close()
+
+
+class MmapFileWriter(Writer, EncodingDoneObserver):
+
+    """Write bytes to memory mapped file presized to size bytes.
+
+    Text is encoded as latin-1, so every char becomes one byte.
+    """
+
+    def __init__(self, path, size):
+        self._file = open(path, 'w+b')
+        self._file.truncate(size)
+        self._map = mmap.mmap(self._file.fileno(), size) if size else None
+        self._position = 0
+
+    def write(self, _input):
+        """Write block to mapping."""
+        if isinstance(_input, str):
+            _input = _input.encode('latin-1')
+        end = self._position + len(_input)
+        self._map[self._position:end] = _input
+        self._position = end
+
+    def finish(self):
+        """Flush mapping and close file."""
+        if self._map is not None:
+            self._map.flush()
+            self._map.close()
+        self._file.truncate(self._position)
         self._file.close()
 
 
@@ -138,6 +497,95 @@ class ConsoleWriter(Writer):
     """Write text to console output."""
 
     def write(self, _input):
-        """Write letter to console."""
+        """Write letter to console, decoding bytes as latin-1."""
+        if not isinstance(_input, str):
+            _input = bytes(_input).decode('latin-1')
         sys.stdout.write(_input)
         sys.stdout.flush()
+
+
+class StdoutWriter(Writer, EncodingDoneObserver):
+
+    """Write blocks to binary standard output.
+
+    Text is encoded as latin-1, so every char becomes one byte. Output
+    is flushed on finish only.
+    """
+
+    def write(self, _input):
+        """Write block to standard output."""
+        if isinstance(_input, str):
+            _input = _input.encode('latin-1')
+        sys.stdout.buffer.write(_input)
+
+    def finish(self):
+        """Flush standard output."""
+        sys.stdout.buffer.flush()
+
+
+class AsyncReader(ABC):
+
+    """Asynchronous reader interface."""
+
+    @abstractmethod
+    def read_blocks(self, block_size=DEFAULT_BLOCK_SIZE):
+        """This method shall be implemented as asynchronous generator."""
+
+
+class AsyncStreamReader(AsyncReader):
+
+    """Read asyncio stream in blocks of bytes."""
+
+    def __init__(self, stream_reader):
+        self._stream_reader = stream_reader
+
+    async def read_blocks(self, block_size=DEFAULT_BLOCK_SIZE):
+        """Read stream in blocks until end of stream.
+
+        :param block_size: maximal number of bytes in block
+        :type block_size: int
+        :return: block_iterator
+        :rtype: asynchronous iterator
+        """
+        while True:
+            block = await self._stream_reader.read(block_size)
+            if not block:
+                return
+            yield block
+
+
+class AsyncWriter(ABC):
+
+    """Asynchronous writer interface."""
+
+    @abstractmethod
+    async def write(self, _input):
+        """This method shall be implemented."""
+
+    @abstractmethod
+    async def finish(self):
+        """This method shall be implemented."""
+
+
+class AsyncStreamWriter(AsyncWriter):
+
+    """Write blocks to asyncio stream, waiting for it to drain.
+
+    Text is encoded as latin-1, so every char becomes one byte.
+    """
+
+    def __init__(self, stream_writer):
+        self._stream_writer = stream_writer
+
+    async def write(self, _input):
+        """Write block to stream and wait until it can take more."""
+        if isinstance(_input, str):
+            _input = _input.encode('latin-1')
+        self._stream_writer.write(_input)
+        await self._stream_writer.drain()
+
+    async def finish(self):
+        """Signal end of stream to the peer, if stream supports it."""
+        if self._stream_writer.can_write_eof():
+            self._stream_writer.write_eof()
+        await self._stream_writer.drain()
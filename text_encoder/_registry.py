@@ -0,0 +1,100 @@
+"""Registry of codecs by name, with cache of prepared coders."""
+
+from functools import lru_cache
+
+from text_encoder._codes import Cesar, Xor, ScalarEncryptionKey, IterableEncryptionKey
+
+ENTRY_POINT_GROUP = 'text_encoder.codecs'
+CODER_CACHE_SIZE = 128
+
+_codecs = {'cesar': Cesar, 'xor': Xor}
+
+
+def register_codec(name, coder_type):
+    """Register coder type under codec name.
+
+    Codecs of installed packages are registered from ``text_encoder.codecs``
+    entry points, each naming a coder type taking key as its only argument.
+
+    :param name: codec name
+    :type name: str
+    :param coder_type: coder type
+    :type coder_type: type
+    """
+    _codecs[name] = coder_type
+    _get_prepared_coder.cache_clear()
+
+
+def get_codec(name):
+    """Get coder type registered under codec name.
+
+    :param name: codec name
+    :type name: str
+    :return: coder type
+    :rtype: type
+    :raises ValueError: if no codec is registered under name
+    """
+    if name not in _codecs:
+        _load_entry_points()
+    try:
+        return _codecs[name]
+    except KeyError:
+        raise ValueError('Unknown codec {!r}.'.format(name)) from None
+
+
+def get_codec_names():
+    """Get names of all registered codecs.
+
+    :return: codec names
+    :rtype: list
+    """
+    _load_entry_points()
+    return sorted(_codecs)
+
+
+def get_key(key):
+    """Get encryption key for key value.
+
+    :param key: int for scalar key, str or sequence of ints for iterable key
+    :type key: int or str or list
+    :return: encryption key
+    :rtype: EncryptionKey
+    """
+    if isinstance(key, int):
+        return ScalarEncryptionKey(key)
+    return IterableEncryptionKey(key)
+
+
+def get_coder(name, key):
+    """Get coder with its key stream at start.
+
+    Coders are prepared once per codec and key, and later calls get a
+    clone sharing translation tables and key arrays of prepared coder.
+
+    :param name: codec name
+    :type name: str
+    :param key: int for scalar key, str or sequence of ints for iterable key
+    :type key: int or str or list
+    :return: coder
+    :rtype: Coder
+    """
+    if not isinstance(key, (int, str)):
+        key = tuple(key)
+    return _get_prepared_coder(name, key).clone()
+
+
+@lru_cache(maxsize=CODER_CACHE_SIZE)
+def _get_prepared_coder(name, key):
+    return get_codec(name)(get_key(key))
+
+
+@lru_cache(maxsize=1)
+def _load_entry_points():
+    from importlib.metadata import entry_points  # pylint: disable=import-outside-toplevel
+    found = entry_points()
+    if hasattr(found, 'select'):
+        found = found.select(group=ENTRY_POINT_GROUP)
+    else:  # pragma no cover
+        found = found.get(ENTRY_POINT_GROUP, [])
+    for entry_point in found:
+        _codecs.setdefault(entry_point.name, entry_point.load())
@@ -0,0 +1,277 @@
+"""Local encoding server and its client.
+
+Request frame: header size and payload size as two big endian 32 bit
+integers, JSON header and payload. Header fields are ``codec`` (registered
+codec name, as ``cesar`` or ``xor``), ``key``, ``keys_int`` or ``key_text`` like in command line,
+and optional ``headed``.
+
+Response frame: status byte, body size as big endian 32 bit integer and
+body, which is encoded payload or error message. Request with header or
+payload over size limit is answered with error and its connection closed.
+"""
+# pylint: disable=too-few-public-methods
+
+from argparse import ArgumentParser
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from copy import copy
+from functools import lru_cache
+import json
+import logging
+import socket
+import struct
+
+from text_encoder.__main__ import CmdArgumentsParser, CmdEncoderFactory
+from text_encoder._metrics import LoggingSink, JsonLinesSink, set_metrics_sinks
+from text_encoder._readers_writers import StringReader, StringWriter, DEFAULT_BLOCK_SIZE
+
+REQUEST_HEADER = struct.Struct('!II')
+RESPONSE_HEADER = struct.Struct('!BI')
+STATUS_OK = 0
+STATUS_ERROR = 1
+DEFAULT_MAX_HEADER_SIZE = 64 * 1024
+DEFAULT_MAX_PAYLOAD_SIZE = 64 * 1024 * 1024
+
+
+class RequestEncoderFactory(CmdEncoderFactory):
+
+    """Encoder factory for server request, encoding payload to string."""
+
+    def __init__(self, arguments, payload):
+        super().__init__(arguments)
+        self._payload = payload
+        self._string_writer = StringWriter()
+
+    @property
+    def output(self):
+        """Encoded payload.
+
+        :return: encoded payload
+        :rtype: str
+        """
+        return self._string_writer.get()
+
+    def _get_reader(self):
+        return StringReader(self._payload)
+
+    def _get_writer(self, observable):
+        return self._string_writer
+
+    def _get_block_size(self):
+        return DEFAULT_BLOCK_SIZE
+
+
+@lru_cache(maxsize=1)
+def _get_default_arguments():
+    return CmdArgumentsParser(ArgumentParser(), []).arguments
+
+
+def encode_request(request, payload):
+    """Encode payload as described by request header.
+
+    :param request: request header
+    :type request: dict
+    :param payload: bytes to encode
+    :type payload: bytes
+    :return: encoded payload
+    :rtype: bytes
+    """
+    arguments = copy(_get_default_arguments())
+    arguments.codec = request.get('codec')
+    arguments.key = request.get('key', 0)
+    arguments.keys_int = request.get('keys_int', 0)
+    arguments.key_text = request.get('key_text', 0)
+    arguments.headed = request.get('headed', False)
+    factory = RequestEncoderFactory(arguments, payload.decode('latin-1'))
+    factory.get_encoder().encode()
+    return factory.output.encode('latin-1')
+
+
+class EncodingServer:
+
+    """Serve framed encoding requests, encoding them on executor.
+
+    Listens on unix socket if socket_path is given, otherwise on TCP
+    host and port.
+    """
+
+    def __init__(self, executor, host='127.0.0.1', port=0, socket_path=None,
+                 max_header_size=DEFAULT_MAX_HEADER_SIZE,
+                 max_payload_size=DEFAULT_MAX_PAYLOAD_SIZE):
+        self._executor = executor
+        self._host = host
+        self._port = port
+        self._socket_path = socket_path
+        self._max_header_size = max_header_size
+        self._max_payload_size = max_payload_size
+        self._server = None
+
+    @property
+    def address(self):
+        """Listening address, available after start.
+
+        :return: socket path or host and port
+        :rtype: str or tuple
+        """
+        return self._server.sockets[0].getsockname()
+
+    async def start(self):
+        """Start listening."""
+        if self._socket_path:
+            self._server = await asyncio.start_unix_server(self._handle_connection,
+                                                           self._socket_path)
+        else:
+            self._server = await asyncio.start_server(self._handle_connection,
+                                                      self._host, self._port)
+
+    async def close(self):
+        """Stop listening and wait for server to close."""
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def serve_forever(self):
+        """Start listening and serve until cancelled."""
+        await self.start()
+        logging.info('Serving on %s', self.address)
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    header_size, payload_size = REQUEST_HEADER.unpack(
+                        await reader.readexactly(REQUEST_HEADER.size))
+                    if header_size > self._max_header_size or \
+                            payload_size > self._max_payload_size:
+                        # Frame is left unread, so connection cannot go on.
+                        await _respond(writer, STATUS_ERROR, b'Request is too large.')
+                        return
+                    header = await reader.readexactly(header_size)
+                    payload = await reader.readexactly(payload_size)
+                except asyncio.IncompleteReadError:
+                    return
+                try:
+                    request = json.loads(header)
+                except ValueError as error:
+                    await _respond(writer, STATUS_ERROR,
+                                   'Malformed request header: {}'.format(error).encode())
+                    continue
+                await _respond(writer, *await self._encode(request, payload))
+        finally:
+            writer.close()
+
+    async def _encode(self, request, payload):
+        loop = asyncio.get_running_loop()
+        try:
+            body = await loop.run_in_executor(self._executor, encode_request, request, payload)
+        except Exception as error:  # pylint: disable=broad-except
+            return STATUS_ERROR, str(error).encode()
+        return STATUS_OK, body
+
+
+async def _respond(writer, status, body):
+    writer.write(RESPONSE_HEADER.pack(status, len(body)))
+    writer.write(body)
+    await writer.drain()
+
+
+class EncodingClient:
+
+    """Send encoding requests to EncodingServer over one connection."""
+
+    def __init__(self, address):
+        family = socket.AF_UNIX if isinstance(address, str) else socket.AF_INET
+        self._socket = socket.socket(family, socket.SOCK_STREAM)
+        self._socket.connect(address)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def encode(self, payload, codec, headed=False, **key):
+        """Encode payload on server.
+
+        :param payload: text to encode, str is treated as latin-1
+        :type payload: str or bytes
+        :param codec: registered codec name, as ``cesar`` or ``xor``
+        :type codec: str
+        :param headed: keep first line not encoded
+        :type headed: bool
+        :param key: one of ``key``, ``keys_int`` or ``key_text``
+        :return: encoded payload
+        :rtype: bytes
+        :raises RuntimeError: if server could not encode payload
+        """
+        if isinstance(payload, str):
+            payload = payload.encode('latin-1')
+        header = json.dumps(dict(key, codec=codec, headed=headed)).encode()
+        self._socket.sendall(REQUEST_HEADER.pack(len(header), len(payload)) + header + payload)
+        status, body_size = RESPONSE_HEADER.unpack(self._receive(RESPONSE_HEADER.size))
+        body = self._receive(body_size)
+        if status != STATUS_OK:
+            raise RuntimeError(body.decode())
+        return body
+
+    def close(self):
+        """Close connection."""
+        self._socket.close()
+
+    def _receive(self, size):
+        chunks = []
+        while size:
+            chunk = self._socket.recv(size)
+            if not chunk:
+                raise ConnectionError('Server closed connection.')
+            chunks.append(chunk)
+            size -= len(chunk)
+        return b''.join(chunks)
+
+
+def _get_metrics_sinks(arguments):
+    sinks = []
+    if arguments.debug:
+        logging.getLogger().setLevel(logging.DEBUG)
+        sinks.append(LoggingSink(logging.DEBUG))
+    if arguments.metrics_file:
+        sinks.append(JsonLinesSink(arguments.metrics_file))
+    return sinks
+
+
+def main(argv):
+    """Run encoding server until interrupted.
+
+    Metrics of requests are not reported, unless asked for, so that no
+    line is logged on every request.
+
+    :param argv: command line arguments after ``serve``
+    :type argv: list
+    """
+    parser = ArgumentParser(prog='python -m text_encoder serve')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='TCP host')
+    parser.add_argument('--port', type=int, default=8765, help='TCP port')
+    parser.add_argument('--socket', type=str, default=None, help='Unix socket path')
+    parser.add_argument('--pool', choices=['thread', 'process'], default='thread',
+                        help='Pool encoding requests')
+    parser.add_argument('--workers', type=int, default=None, help='Pool size')
+    parser.add_argument('--max_header_size', type=int, default=DEFAULT_MAX_HEADER_SIZE,
+                        help='Reject requests with header over N bytes')
+    parser.add_argument('--max_payload_size', type=int, default=DEFAULT_MAX_PAYLOAD_SIZE,
+                        help='Reject requests with payload over N bytes')
+    parser.add_argument('--metrics_file', type=str, default=None,
+                        help='Append metrics of every request to file as JSON lines')
+    parser.add_argument('--debug', action='store_true',
+                        help='Log metrics of every request')
+    arguments = parser.parse_args(argv)
+    set_metrics_sinks(*_get_metrics_sinks(arguments))
+
+    executor_type = ProcessPoolExecutor if arguments.pool == 'process' else ThreadPoolExecutor
+    with executor_type(arguments.workers) as executor:
+        server = EncodingServer(executor, arguments.host, arguments.port, arguments.socket,
+                                arguments.max_header_size, arguments.max_payload_size)
+        try:
+            asyncio.run(server.serve_forever())
+        except KeyboardInterrupt:  # pragma no cover
+            pass
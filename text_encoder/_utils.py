@@ -1,22 +1,32 @@
 """Utils."""
 
-import time
-import logging
+from functools import wraps
+from time import perf_counter_ns
+
+from text_encoder._metrics import RunMetrics, _current_run, emit_metrics
 
 
 def time_it(original_function):
-    """Log time of executed function.
+    """Measure executed function and report its metrics to metrics sinks.
+
+    Metrics collected by the function through ``current_run`` are
+    reported together with its execution time.
 
     :param original_function: function which execution time is measured
     :type original_function: function
     :return: wrapper
     :rtype: function
     """
+    @wraps(original_function)
     def wrapper(*args, **kwargs):
-        start_time = time.time()
-        original_function(*args, **kwargs)
-        end_time = time.time()
-        logging.info('{} complete in {:.2f} seconds.'.format(original_function.__name__,
-                                                             end_time - start_time))
+        metrics = RunMetrics(original_function.__qualname__)
+        token = _current_run.set(metrics)
+        start_time = perf_counter_ns()
+        try:
+            return original_function(*args, **kwargs)
+        finally:
+            metrics.elapsed_ns = perf_counter_ns() - start_time
+            _current_run.reset(token)
+            emit_metrics(metrics)
 
     return wrapper